@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence
+
+# Frame rate the GUI loops aim for
+TARGET_FPS = 60
+
+# Batches the worker may run ahead of the display
+QUEUE_BATCHES = 64
+
+# Items shown per second at normal speed, 20 matches the old 0.05s per cell
+DEFAULT_SPEED = 20.0
+MIN_SPEED = 0.5
+MAX_SPEED = 1 << 20
+
+_DONE = object()  # Queued after the last batch
+
+class Cancelled(Exception):
+    """Raised by Animation.emit once the animation is cancelled, ending produce early"""
+
+class Animation:
+    """Streams items produced on a worker thread to the UI at a controlled rate.
+
+    produce(emit) runs on a daemon thread. It hands batches over through
+    a bounded queue, either by calling emit(batch) while it runs or by
+    returning an iterable of batches. A full queue blocks the worker, so it
+    never runs far ahead of the display, and after cancel() emit raises
+    Cancelled, so a long search stops at its next batch. Each frame,
+    take() returns as many items as the speed and the time since the
+    previous frame allow, so the UI keeps handling input however long the
+    search or the animation is.
+    """
+
+    def __init__(self, produce: Callable[[Callable[[Sequence], None]], Optional[Iterable[Sequence]]],
+                 speed: float = DEFAULT_SPEED,
+                 max_batches: int = QUEUE_BATCHES):
+        self.speed = speed
+        self.paused = False
+        self.skipping = False  # Show everything left on the next frame
+        self.finished = False  # Every item was taken
+        self.error = None  # Exception raised by produce, re-raised by take
+        self._queue = queue.Queue(max_batches)
+        self._cancelled = threading.Event()
+        self._batch = ()
+        self._index = 0
+        self._credit = 0.0
+        self._last = time.perf_counter()
+        self._thread = threading.Thread(target=self._work, args=(produce,), daemon=True)
+        self._thread.start()
+
+    def _work(self, produce):
+        try:
+            for batch in produce(self.emit) or ():
+                self.emit(batch)
+        except Cancelled:
+            return
+        except Exception as e:
+            self.error = e
+        self._put(_DONE)
+
+    def emit(self, batch: Sequence):
+        """Queue a batch from the worker, waiting while the queue is full"""
+        if not self._put(batch):
+            raise Cancelled()
+
+    def _put(self, item) -> bool:
+        """Blocking put that gives up once cancelled"""
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _next_batch(self, block: bool) -> bool:
+        try:
+            batch = self._queue.get(block)
+        except queue.Empty:
+            return False
+        if batch is _DONE:
+            self.finished = True
+            if self.error is not None:
+                raise self.error
+            return False
+        self._batch, self._index = batch, 0
+        return True
+
+    def take(self) -> List:
+        """Items due this frame, empty while paused or when the worker is behind"""
+        now = time.perf_counter()
+        elapsed, self._last = now - self._last, now
+        if self.finished or self.paused:
+            return []
+        if self.skipping:
+            budget = None
+        else:
+            self._credit += elapsed * self.speed
+            budget = int(self._credit)
+            self._credit -= budget
+
+        items = []
+        while budget is None or len(items) < budget:
+            if self._index >= len(self._batch):
+                # Skipping waits for the worker, otherwise a slow worker only shortens the frame
+                if not self._next_batch(block=budget is None):
+                    break
+                continue
+            count = len(self._batch) - self._index
+            if budget is not None:
+                count = min(count, budget - len(items))
+            items.extend(self._batch[self._index:self._index + count])
+            self._index += count
+        if budget is not None and len(items) < budget:
+            self._credit = 0.0  # Do not bank time spent waiting on the worker
+        return items
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+
+    def skip(self):
+        self.paused = False
+        self.skipping = True
+
+    def faster(self):
+        self.speed = min(self.speed * 2, MAX_SPEED)
+
+    def slower(self):
+        self.speed = max(self.speed / 2, MIN_SPEED)
+
+    def cancel(self, timeout: Optional[float] = 1.0):
+        """Stop the worker and drop everything not shown yet"""
+        self._cancelled.set()
+        self.finished = True
+        self._thread.join(timeout)
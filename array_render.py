@@ -0,0 +1,111 @@
+import pygame
+from typing import Iterable, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # The per-cell renderer is used without NumPy
+    np = None
+
+# Cell states, indexes into the palette
+EMPTY = 0
+WALL = 1
+VISITED = 2
+CURRENT = 3
+PATH = 4
+START = 5
+END = 6
+STOP = 7
+STATE_COUNT = 8
+
+# Grids with at least this many cells are drawn with ArrayRenderer
+ARRAY_RENDER_MIN_CELLS = 10_000
+
+# Grid lines are left out when cells are smaller than this many pixels
+MIN_LINED_CELL = 4
+
+_COLORKEY = (255, 0, 255)
+
+def available() -> bool:
+    return np is not None
+
+def should_use(grid_size: int) -> bool:
+    """Whether a grid_size x grid_size grid is large enough for the array renderer"""
+    return available() and grid_size * grid_size >= ARRAY_RENDER_MIN_CELLS
+
+class ArrayRenderer:
+    """Draws the whole grid in one blit from a uint8 state per cell.
+
+    state is indexed [x, y] like pygame.surfarray. draw() maps it through
+    the palette, writes it to a one-pixel-per-cell surface, scales that to
+    the cell size and blits it, so the cost per frame does not depend on
+    how many cells changed. Callers keep state up to date with set_cell,
+    set_cells and set_walls.
+    """
+
+    def __init__(self, grid_size: int, cell_size: int, origin: Tuple[int, int],
+                 palette: Sequence[Tuple[int, int, int]], line_color: Optional[Tuple[int, int, int]] = None):
+        self.grid_size = grid_size
+        self.cell_size = cell_size
+        self.origin = origin
+        self.state = np.zeros((grid_size, grid_size), np.uint8)
+        self.palette = np.zeros((STATE_COUNT, 3), np.uint8)
+        self.palette[:len(palette)] = palette
+        self.heat = None  # (rgb, reachable) drawn over empty cells
+        self.surface = pygame.Surface((grid_size, grid_size))
+        self.pixel_size = (grid_size * cell_size, grid_size * cell_size)
+        self.lines = None
+        if line_color is not None and cell_size >= MIN_LINED_CELL:
+            self.lines = self._grid_lines(line_color)
+
+    def _grid_lines(self, color) -> pygame.Surface:
+        lines = pygame.Surface(self.pixel_size)
+        lines.fill(_COLORKEY)
+        lines.set_colorkey(_COLORKEY)
+        width, height = self.pixel_size
+        for x in range(0, width, self.cell_size):
+            pygame.draw.line(lines, color, (x, 0), (x, height))
+        for y in range(0, height, self.cell_size):
+            pygame.draw.line(lines, color, (0, y), (width, y))
+        return lines
+
+    def set_color(self, state: int, color: Tuple[int, int, int]):
+        self.palette[state] = color
+
+    def set_walls(self, cells: bytes, wall: int):
+        """Reset every cell to EMPTY or WALL from a GridModel cell buffer"""
+        blocked = np.frombuffer(cells, np.uint8).reshape(self.grid_size, self.grid_size).T == wall
+        self.state[:] = EMPTY
+        self.state[blocked] = WALL
+
+    def set_cell(self, pos: Tuple[int, int], state: int):
+        self.state[pos] = state
+
+    def set_cells(self, positions: Iterable[Tuple[int, int]], state: int):
+        positions = list(positions)
+        if positions:
+            xs, ys = zip(*positions)
+            self.state[list(xs), list(ys)] = state
+
+    def set_heat(self, distance: Optional[Sequence[float]], max_distance: float = 1.0,
+                 near: Tuple[int, int, int] = (0, 0, 0), far: Tuple[int, int, int] = (0, 0, 0)):
+        """Shade empty cells by distance (indexed by cell id), None turns the heatmap off"""
+        if distance is None:
+            self.heat = None
+            return
+        d = np.asarray(distance, np.float64).reshape(self.grid_size, self.grid_size).T
+        reachable = np.isfinite(d)
+        t = np.where(reachable, d, 0.0) / (max_distance or 1.0)
+        near, far = np.array(near, np.float64), np.array(far, np.float64)
+        rgb = (near + (far - near) * t[..., None]).astype(np.uint8)
+        self.heat = (rgb, reachable)
+
+    def draw(self, screen: pygame.Surface):
+        rgb = self.palette[self.state]
+        if self.heat is not None:
+            heat_rgb, reachable = self.heat
+            shaded = reachable & (self.state == EMPTY)
+            rgb[shaded] = heat_rgb[shaded]
+        pygame.surfarray.blit_array(self.surface, rgb)
+        screen.blit(pygame.transform.scale(self.surface, self.pixel_size), self.origin)
+        if self.lines is not None:
+            screen.blit(self.lines, self.origin)
@@ -1,63 +1,172 @@
-from typing import List, Set, Dict, Tuple
-import heapq
+from typing import Iterable, List, Optional, Set, Tuple, Union
+from array import array
+from grid_model import GridModel, as_grid_model, reconstruct_path
+from frontier import make_frontier, track
+from heuristics import get_heuristic, make_priority, make_goal_priority, nearest_goal
+from stats import SearchStats
+from steps import StepRecorder, observe
+
+INF = float('inf')
 
 class AStar:
-    def __init__(self, grid_size: int):
+    def __init__(self, grid_size: int, frontier: str = "lazy", heuristic: str = "octile",
+                 weight: float = 1.0, tie_break: str = "larger_g"):
         self.grid_size = grid_size
-
-    def get_neighbors(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
-        """Returns valid neighboring positions"""
-        x, y = pos
-        neighbors = []
-        
-        # Check all 8 surrounding positions
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]:
-            new_x, new_y = x + dx, y + dy
-            if 0 <= new_x < self.grid_size and 0 <= new_y < self.grid_size:
-                neighbors.append((new_x, new_y))
-        return neighbors
+        self.frontier = frontier
+        self.heuristic_name = heuristic
+        self.weight = weight
+        self.tie_break = tie_break
+        self._heuristic = get_heuristic(heuristic, weight)
+        self.counters = {}  # Frontier counters of the last search
+        self.explored = None  # Closed set of the last search, used for cache invalidation
 
     def heuristic(self, a: Tuple[int, int], b: Tuple[int, int]) -> float:
-        """Calculate Manhattan distance between two points"""
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    def find_path(self, start: Tuple[int, int], end: Tuple[int, int], walls: Set[Tuple[int, int]]) -> List[Tuple[int, int]]:
-        """Find path using A* algorithm"""
-        frontier = []
-        heapq.heappush(frontier, (0, start))
-        
-        came_from: Dict[Tuple[int, int], Tuple[int, int]] = {}
-        cost_so_far: Dict[Tuple[int, int], float] = {}
-        
-        came_from[start] = None
-        cost_so_far[start] = 0
-
-        while frontier:
-            current = heapq.heappop(frontier)[1]
-
-            if current == end:
+        """Estimate the remaining cost between two points with the configured heuristic"""
+        return self._heuristic(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+    def priority_function(self, start: Tuple[int, int], end: Tuple[int, int]):
+        """Returns priority(g, x, y) combining the heuristic and tie-breaking rule"""
+        return make_priority(self._heuristic, self.tie_break, start, end)
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  walls: Union[GridModel, Set[Tuple[int, int]]],
+                  stats: Optional[SearchStats] = None,
+                  steps: Optional[StepRecorder] = None) -> List[Tuple[int, int]]:
+        """Find path using A* algorithm, filling stats and emitting steps if they are given"""
+        if stats is not None:
+            stats.start()
+        grid = as_grid_model(self.grid_size, walls)
+        width = grid.width
+        table = grid.neighbor_table()
+        offsets, ends = table.offsets, table.ends
+        targets, costs = table.targets, table.costs
+        start_id = grid.cell_id(start)
+        end_id = grid.cell_id(end)
+        if stats is None:
+            priority = self.priority_function(start, end)
+        else:
+            priority = make_priority(stats.count_calls(self._heuristic), self.tie_break, start, end)
+
+        frontier = make_frontier(self.frontier, grid.size)
+        if stats is not None:
+            track(frontier)
+        if steps is not None:
+            observe(frontier, steps)
+        closed = frontier.closed
+        frontier.push(start_id, 0)
+
+        # Per-cell search state indexed by cell id
+        came_from = array('i', [-1]) * grid.size
+        cost_so_far = array('d', [INF]) * grid.size
+        cost_so_far[start_id] = 0
+
+        while True:
+            current = frontier.pop()  # Closes current, stale entries are skipped
+            if current == -1:
+                break
+
+            if current == end_id:
+                break
+
+            current_cost = cost_so_far[current]
+            for k in range(offsets[current], ends[current]):
+                next_id = targets[k]
+                if closed[next_id]:
+                    continue
+
+                # Edge costs come precomputed from the neighbor table (diagonals cost 1.414)
+                new_cost = current_cost + costs[k]
+
+                if new_cost < cost_so_far[next_id]:
+                    cost_so_far[next_id] = new_cost
+                    next_y, next_x = divmod(next_id, width)
+                    frontier.push(next_id, priority(new_cost, next_x, next_y))
+                    came_from[next_id] = current
+
+        self.counters = frontier.counters()
+        self.explored = closed
+        if stats is not None:
+            stats.add_frontier(frontier)
+            stats.stop()
+        path = reconstruct_path(grid, came_from, start_id, end_id)
+        if steps is not None:
+            steps.emit_path(grid, path)
+        return path
+
+    def find_nearest(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]],
+                     walls: Union[GridModel, Set[Tuple[int, int]]],
+                     stats: Optional[SearchStats] = None,
+                     steps: Optional[StepRecorder] = None) -> Tuple[Optional[Tuple[int, int]], List[Tuple[int, int]], float]:
+        """Find the goal with the cheapest path in one search, returns (goal, path, cost).
+
+        The heuristic is the minimum over all goals, so the first goal
+        closed is the nearest one. Returns (None, [], inf) if no goal is reachable.
+        """
+        if stats is not None:
+            stats.start()
+        grid = as_grid_model(self.grid_size, walls)
+        width = grid.width
+        table = grid.neighbor_table()
+        offsets, ends = table.offsets, table.ends
+        targets, costs = table.targets, table.costs
+        goals = list(goals)
+        is_goal = bytearray(grid.size)
+        for goal in goals:
+            is_goal[grid.cell_id(goal)] = 1
+        start_id = grid.cell_id(start)
+        estimate = nearest_goal(self._heuristic if stats is None else stats.count_calls(self._heuristic), goals)
+        priority = make_goal_priority(self.tie_break)
+
+        frontier = make_frontier(self.frontier, grid.size)
+        if stats is not None:
+            track(frontier)
+        if steps is not None:
+            observe(frontier, steps)
+        closed = frontier.closed
+        if goals:
+            frontier.push(start_id, 0)
+
+        # Per-cell search state indexed by cell id, estimates are computed once per cell
+        came_from = array('i', [-1]) * grid.size
+        cost_so_far = array('d', [INF]) * grid.size
+        estimates = array('d', [-1.0]) * grid.size
+        cost_so_far[start_id] = 0
+        end_id = -1
+
+        while True:
+            current = frontier.pop()  # Closes current, stale entries are skipped
+            if current == -1:
+                break
+
+            if is_goal[current]:
+                end_id = current
                 break
 
-            for next_pos in self.get_neighbors(current):
-                if next_pos in walls:
+            current_cost = cost_so_far[current]
+            for k in range(offsets[current], ends[current]):
+                next_id = targets[k]
+                if closed[next_id]:
                     continue
 
-                # Diagonal movement costs more
-                is_diagonal = abs(next_pos[0] - current[0]) == 1 and abs(next_pos[1] - current[1]) == 1
-                new_cost = cost_so_far[current] + (1.414 if is_diagonal else 1.0)
-
-                if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
-                    cost_so_far[next_pos] = new_cost
-                    priority = new_cost + self.heuristic(end, next_pos)
-                    heapq.heappush(frontier, (priority, next_pos))
-                    came_from[next_pos] = current
-
-        # Reconstruct path
-        path = []
-        current = end
-        while current is not None:
-            path.append(current)
-            current = came_from.get(current)
-        
-        path.reverse()
-        return path if path[0] == start else []
\ No newline at end of file
+                new_cost = current_cost + costs[k]
+
+                if new_cost < cost_so_far[next_id]:
+                    cost_so_far[next_id] = new_cost
+                    h = estimates[next_id]
+                    if h < 0:
+                        next_y, next_x = divmod(next_id, width)
+                        h = estimates[next_id] = estimate(next_x, next_y)
+                    frontier.push(next_id, priority(new_cost, h))
+                    came_from[next_id] = current
+
+        self.counters = frontier.counters()
+        self.explored = closed
+        if stats is not None:
+            stats.add_frontier(frontier)
+            stats.stop()
+        if end_id == -1:
+            return None, [], INF
+        path = reconstruct_path(grid, came_from, start_id, end_id)
+        if steps is not None:
+            steps.emit_path(grid, path)
+        return grid.cell_pos(end_id), path, cost_so_far[end_id]
@@ -0,0 +1,69 @@
+import os
+from multiprocessing import get_context, shared_memory, util
+from typing import Iterable, Iterator, List, Optional, Tuple
+from grid_model import GridModel
+
+# Pools start workers with spawn: forking copies every thread's locks, and
+# find_paths is called from GUI worker threads with SDL or Qt loaded
+START_METHOD = "spawn"
+
+# Per-process state set up once by _init_worker
+_worker_grid: Optional[GridModel] = None
+_worker_engine = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+def _init_worker(memory_name: str, width: int, height: int, engine: str, frontier: str):
+    """Attach to the shared occupancy buffer and build the engine once per process"""
+    global _worker_grid, _worker_engine, _worker_memory
+    from pathfinder import PathFinder
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_grid = GridModel.from_buffer(width, height, _worker_memory.buf[:width * height])
+    _worker_engine = PathFinder(width, _worker_grid, frontier).get_engine(engine)
+    util.Finalize(None, _detach_worker, exitpriority=10)
+
+def _detach_worker():
+    """Release the grid's view of the shared buffer so the segment can close when the worker exits"""
+    _worker_grid.cells.release()
+    _worker_memory.close()
+
+def _solve(task: Tuple[int, Tuple[int, int], Tuple[int, int]]) -> Tuple[int, List[Tuple[int, int]]]:
+    index, start, end = task
+    return index, _worker_engine.find_path(start, end, _worker_grid)
+
+def find_paths(grid: GridModel, pairs: Iterable[Tuple[Tuple[int, int], Tuple[int, int]]],
+               workers: Optional[int] = None, engine: str = "astar", frontier: str = "lazy",
+               chunksize: int = 16) -> Iterator[Tuple[int, List[Tuple[int, int]]]]:
+    """Solve many (start, end) pairs against one wall layout.
+
+    The occupancy buffer is copied into shared memory once and every worker
+    attaches to it, so tasks only carry their endpoints. Yields
+    (index, path) in completion order, index being the position in pairs.
+    workers=1 runs in-process without a pool.
+    """
+    tasks = ((index, start, end) for index, (start, end) in enumerate(pairs))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        from pathfinder import PathFinder
+        algorithm = PathFinder(grid.width, grid, frontier).get_engine(engine)
+        for index, start, end in tasks:
+            yield index, algorithm.find_path(start, end, grid)
+        return
+
+    memory = shared_memory.SharedMemory(create=True, size=max(grid.size, 1))
+    try:
+        memory.buf[:grid.size] = grid.cells
+        pool = get_context(START_METHOD).Pool(workers, initializer=_init_worker,
+                                              initargs=(memory.name, grid.width, grid.height, engine, frontier))
+        try:
+            yield from pool.imap_unordered(_solve, tasks, chunksize)
+        except BaseException:
+            pool.terminate()
+            raise
+        else:
+            # Let workers exit on their own, SDL may have turned SIGTERM into a quit event
+            pool.close()
+        finally:
+            pool.join()
+    finally:
+        memory.close()
+        memory.unlink()
@@ -0,0 +1,2 @@
+from benchmarks.generators import GENERATORS, make_map, query_pairs
+from benchmarks.runner import run, compare, write_json, write_csv, load_rows
@@ -0,0 +1,40 @@
+import argparse
+import sys
+from pathfinder import ENGINES
+from benchmarks.generators import GENERATORS
+from benchmarks.runner import ANIMATED, NAMES, run, compare, write_json, write_csv, load_rows, format_table
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Headless engine benchmarks on generated maps")
+    parser.add_argument("--generators", nargs="+", default=sorted(GENERATORS), choices=sorted(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[32, 64, 128])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES) + list(ANIMATED),
+                        choices=NAMES, metavar="ENGINE",
+                        help="engines to run, the AStar variants are named like 'astar:octile/cross'")
+    parser.add_argument("--queries", type=int, default=20, help="queries per map")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--json", help="write the report as JSON (usable as a baseline)")
+    parser.add_argument("--csv", help="write the rows as CSV")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative time/memory increase")
+    args = parser.parse_args(argv)
+
+    rows = run(args.generators, args.sizes, args.engines, args.queries, args.seed, not args.no_memory)
+    print(format_table(rows))
+    if args.json:
+        write_json(rows, args.json)
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.baseline:
+        problems = compare(rows, load_rows(args.baseline), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            return 1
+        print("No regressions against", args.baseline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import random
+from typing import Callable, Dict, List, Tuple
+from grid_model import GridModel, WALL, FREE
+
+def noise(width: int, height: int, seed: int, density: float = 0.3) -> GridModel:
+    """Independent random walls, density is the wall probability per cell"""
+    rng = random.Random(seed)
+    grid = GridModel(width, height)
+    grid.cells[:] = bytes(WALL if rng.random() < density else FREE for _ in range(grid.size))
+    return grid
+
+def maze(width: int, height: int, seed: int) -> GridModel:
+    """Recursive-division maze: chambers split by walls with one gap each"""
+    rng = random.Random(seed)
+    grid = GridModel(width, height)
+    cells = grid.cells
+    # Explicit stack of chambers (x0, y0, x1, y1), inclusive
+    chambers = [(0, 0, width - 1, height - 1)]
+    while chambers:
+        x0, y0, x1, y1 = chambers.pop()
+        chamber_width, chamber_height = x1 - x0 + 1, y1 - y0 + 1
+        if chamber_width < 3 and chamber_height < 3:
+            continue
+        horizontal = chamber_height > chamber_width or (chamber_height == chamber_width and rng.random() < 0.5)
+        if horizontal and chamber_height >= 3:
+            # Walls on odd offsets and gaps on even ones keep passages open
+            wall_y = y0 + 1 + 2 * rng.randrange((chamber_height - 1) // 2)
+            gap_x = x0 + 2 * rng.randrange((chamber_width + 1) // 2)
+            for x in range(x0, x1 + 1):
+                if x != gap_x:
+                    cells[wall_y * width + x] = WALL
+            chambers.append((x0, y0, x1, wall_y - 1))
+            chambers.append((x0, wall_y + 1, x1, y1))
+        elif chamber_width >= 3:
+            wall_x = x0 + 1 + 2 * rng.randrange((chamber_width - 1) // 2)
+            gap_y = y0 + 2 * rng.randrange((chamber_height + 1) // 2)
+            for y in range(y0, y1 + 1):
+                if y != gap_y:
+                    cells[y * width + wall_x] = WALL
+            chambers.append((x0, y0, wall_x - 1, y1))
+            chambers.append((wall_x + 1, y0, x1, y1))
+    return grid
+
+def rooms(width: int, height: int, seed: int, room_size: int = 8) -> GridModel:
+    """Grid of rooms separated by walls, with one or two doors between neighboring rooms"""
+    rng = random.Random(seed)
+    grid = GridModel(width, height)
+    cells = grid.cells
+    for y in range(room_size, height, room_size):
+        for x in range(width):
+            cells[y * width + x] = WALL
+    for x in range(room_size, width, room_size):
+        for y in range(height):
+            cells[y * width + x] = WALL
+    # Doors through every wall segment between two rooms
+    for y in range(room_size, height, room_size):
+        for x0 in range(0, width, room_size):
+            for _ in range(rng.randint(1, 2)):
+                cells[y * width + min(x0 + rng.randrange(1, room_size), width - 1)] = FREE
+    for x in range(room_size, width, room_size):
+        for y0 in range(0, height, room_size):
+            for _ in range(rng.randint(1, 2)):
+                cells[min(y0 + rng.randrange(1, room_size), height - 1) * width + x] = FREE
+    return grid
+
+def open_field(width: int, height: int, seed: int) -> GridModel:
+    """No walls at all, the best case for heuristics"""
+    return GridModel(width, height)
+
+
+# Map generators selectable by name, all called as generator(width, height, seed)
+GENERATORS: Dict[str, Callable[..., GridModel]] = {
+    "noise": noise,
+    "maze": maze,
+    "rooms": rooms,
+    "open": open_field,
+}
+
+def make_map(kind: str, width: int, height: int, seed: int) -> GridModel:
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown generator '{kind}', expected one of {sorted(GENERATORS)}")
+    return GENERATORS[kind](width, height, seed)
+
+def query_pairs(grid: GridModel, count: int, seed: int) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Seeded (start, end) pairs of distinct free cells, reachable or not"""
+    rng = random.Random(seed)
+    free = [cell_id for cell_id in range(grid.size) if grid.cells[cell_id] != WALL]
+    if len(free) < 2:
+        return []
+    pairs = []
+    for _ in range(count):
+        start_id, end_id = rng.sample(free, 2)
+        pairs.append((grid.cell_pos(start_id), grid.cell_pos(end_id)))
+    return pairs
@@ -0,0 +1,176 @@
+import csv
+import json
+import platform
+import time
+import tracemalloc
+from typing import Dict, Iterable, List, Tuple
+from astar import AStar
+from grid_model import GridModel, path_cost
+from heuristics import HEURISTICS, TIE_BREAKERS
+from pathfinder import PathFinder, ENGINES
+from benchmarks.generators import make_map, query_pairs
+
+# Engines run through PathFinder.find_path_animated, drained without rendering
+ANIMATED = {
+    "animated_astar": "astar",
+    "animated_dijkstra": "dijkstra",
+}
+
+# Weights of the weighted A* variants, run with the octile heuristic
+WEIGHTS = (1.5, 2.0)
+
+def _astar_variants() -> Dict[str, Tuple[str, float, str]]:
+    """AStar settings (heuristic, weight, tie_break) by engine name, one per registry entry"""
+    variants = {}
+    for heuristic in HEURISTICS:
+        for tie_break in TIE_BREAKERS:
+            variants[f"astar:{heuristic}/{tie_break}"] = (heuristic, 1.0, tie_break)
+    for weight in WEIGHTS:
+        variants[f"astar:octile w={weight:g}"] = ("octile", weight, "larger_g")
+    return variants
+
+# AStar heuristic and tie-breaking variants, e.g. "astar:manhattan/none"
+VARIANTS = _astar_variants()
+
+# Every name the runner accepts
+NAMES = list(ENGINES) + list(ANIMATED) + list(VARIANTS)
+
+# Columns written to CSV, in order
+FIELDS = ["generator", "size", "seed", "engine", "queries", "solved",
+          "time_total", "time_mean", "expansions", "peak_kb", "cost_total"]
+
+# Row fields identifying the same measurement across runs
+KEY_FIELDS = ("generator", "size", "seed", "engine")
+
+# Time differences below this many seconds are treated as noise
+TIME_SLACK = 0.005
+
+def _expansions(counters: Dict[str, int]) -> int:
+    return counters.get("pops", 0) - counters.get("stale_pops", 0)
+
+def _run_queries(name: str, grid: GridModel, pairs) -> Tuple[List[float], int, List[List[Tuple[int, int]]]]:
+    """Solve every pair with a fresh PathFinder, returns (seconds per query, expansions, paths)"""
+    finder = PathFinder(grid.width, grid, cache_size=0)
+    # Shared per-grid structures are built up front so no engine pays for them
+    grid.neighbor_table()
+    finder.components
+    variant = None  # AStar variants are not registered with PathFinder, so one is built here
+    if name in VARIANTS:
+        heuristic, weight, tie_break = VARIANTS[name]
+        variant = AStar(grid.width, finder.frontier, heuristic, weight, tie_break)
+    times, paths = [], []
+    expansions = 0
+    for start, end in pairs:
+        finder.start_pos, finder.end_pos = start, end
+        if name in ANIMATED:
+            began = time.perf_counter()
+            path = []
+            for step, cell in finder.find_path_animated(engine=ANIMATED[name]):
+                if step == "visit":
+                    expansions += 1
+                else:
+                    path.append(cell)
+            path.reverse()
+        else:
+            # Engines are called directly so the cache and reachability check stay out of the numbers
+            engine = variant or finder.get_engine(name)
+            began = time.perf_counter()
+            path = engine.find_path(start, end, grid)
+            expansions += _expansions(engine.counters)
+        times.append(time.perf_counter() - began)
+        paths.append(path)
+    return times, expansions, paths
+
+def _peak_kb(name: str, grid: GridModel, pairs) -> float:
+    """Peak traced allocation of a separate run, so tracing does not slow the timed one"""
+    tracemalloc.start()
+    try:
+        _run_queries(name, grid, pairs)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def run(generators: Iterable[str], sizes: Iterable[int], engines: Iterable[str],
+        queries: int = 20, seed: int = 0, memory: bool = True) -> List[Dict]:
+    """Benchmark every engine on every generated map, returns one row per (map, engine)"""
+    rows = []
+    engines = list(engines)
+    for unknown in set(engines) - set(NAMES):
+        raise ValueError(f"Unknown engine '{unknown}', expected one of {sorted(NAMES)}")
+    for generator in generators:
+        for size in sizes:
+            grid = make_map(generator, size, size, seed)
+            pairs = query_pairs(grid, queries, seed)
+            for name in engines:
+                times, expansions, paths = _run_queries(name, grid, pairs)
+                rows.append({
+                    "generator": generator,
+                    "size": size,
+                    "seed": seed,
+                    "engine": name,
+                    "queries": len(pairs),
+                    "solved": sum(1 for path in paths if path),
+                    "time_total": sum(times),
+                    "time_mean": sum(times) / len(times) if times else 0.0,
+                    "expansions": expansions,
+                    "peak_kb": _peak_kb(name, grid, pairs) if memory else None,
+                    "cost_total": round(sum(path_cost(path) for path in paths), 3),
+                })
+    return rows
+
+def write_json(rows: List[Dict], path: str):
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": rows,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+def write_csv(rows: List[Dict], path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def load_rows(path: str) -> List[Dict]:
+    with open(path) as f:
+        return json.load(f)["rows"]
+
+def compare(rows: List[Dict], baseline: List[Dict], tolerance: float = 0.25) -> List[str]:
+    """Regressions against a baseline report, empty if there are none.
+
+    Time is compared with a relative tolerance since it is noisy, while
+    expansions, solved counts and path costs are deterministic for a seed
+    and must not get worse at all.
+    """
+    previous = {tuple(row[field] for field in KEY_FIELDS): row for row in baseline}
+    problems = []
+    for row in rows:
+        old = previous.get(tuple(row[field] for field in KEY_FIELDS))
+        if old is None:
+            continue
+        label = "{generator}/{size}/{engine}".format(**row)
+        if row["solved"] != old["solved"]:
+            problems.append(f"{label}: solved {old['solved']} -> {row['solved']}")
+        if row["cost_total"] > old["cost_total"] + 1e-6:
+            problems.append(f"{label}: path cost {old['cost_total']} -> {row['cost_total']}")
+        if row["expansions"] > old["expansions"]:
+            problems.append(f"{label}: expansions {old['expansions']} -> {row['expansions']}")
+        if row["time_total"] > old["time_total"] * (1 + tolerance) + TIME_SLACK:
+            problems.append(f"{label}: time {old['time_total']:.4f}s -> {row['time_total']:.4f}s")
+        if row["peak_kb"] is not None and old.get("peak_kb") is not None and \
+                row["peak_kb"] > old["peak_kb"] * (1 + tolerance):
+            problems.append(f"{label}: peak memory {old['peak_kb']:.0f}KB -> {row['peak_kb']:.0f}KB")
+    return problems
+
+def format_table(rows: List[Dict]) -> str:
+    lines = [f"{'generator':<8} {'size':>5} {'engine':<24} {'solved':>7} {'time ms':>9} "
+             f"{'expanded':>9} {'peak KB':>8} {'cost':>10}"]
+    for row in rows:
+        peak = f"{row['peak_kb']:.0f}" if row["peak_kb"] is not None else "-"
+        lines.append(f"{row['generator']:<8} {row['size']:>5} {row['engine']:<24} "
+                     f"{row['solved']:>3}/{row['queries']:<3} {row['time_total'] * 1000:>9.1f} "
+                     f"{row['expansions']:>9} {peak:>8} {row['cost_total']:>10.1f}")
+    return "\n".join(lines)
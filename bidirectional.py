@@ -0,0 +1,153 @@
+from array import array
+from typing import Callable, List, Optional, Set, Tuple, Union
+from grid_model import GridModel, WALL, as_grid_model
+from frontier import make_frontier, track
+from heuristics import get_heuristic
+from stats import SearchStats
+from steps import StepRecorder, observe
+
+INF = float('inf')
+
+class BidirectionalSearch:
+    """Searches forward from start and backward from end until the frontiers meet.
+
+    Each side orders its frontier by g plus a potential. With the average
+    potentials pf(v) = (h(v, end) - h(v, start)) / 2 and pr(v) = -pf(v), the
+    search may stop as soon as top_forward + top_backward >= mu, where mu is
+    the best start-end cost seen through any cell labelled by both sides.
+    A zero heuristic turns this into bidirectional Dijkstra.
+    """
+
+    def __init__(self, grid_size: int, frontier: str = "lazy", heuristic: Optional[str] = None):
+        self.grid_size = grid_size
+        self.frontier = frontier
+        self._heuristic = get_heuristic(heuristic) if heuristic else None
+        self.counters = {}  # Summed frontier counters of both sides for the last search
+
+    def _potential(self, start: Tuple[int, int], end: Tuple[int, int], width: int,
+                   stats: Optional[SearchStats] = None) -> Optional[Callable[[int], float]]:
+        """Forward potential pf(cell_id), the backward side uses -pf"""
+        heuristic = self._heuristic
+        if heuristic is None:
+            return None
+        if stats is not None:
+            heuristic = stats.count_calls(heuristic)
+        start_x, start_y = start
+        end_x, end_y = end
+
+        def potential(cell_id):
+            y, x = divmod(cell_id, width)
+            return 0.5 * (heuristic(abs(end_x - x), abs(end_y - y)) -
+                          heuristic(abs(start_x - x), abs(start_y - y)))
+        return potential
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  walls: Union[GridModel, Set[Tuple[int, int]]],
+                  stats: Optional[SearchStats] = None,
+                  steps: Optional[StepRecorder] = None) -> List[Tuple[int, int]]:
+        """Find shortest path searching from both ends.
+
+        Both frontiers feed steps, so their events interleave.
+        """
+        if stats is not None:
+            stats.start()
+        grid = as_grid_model(self.grid_size, walls)
+        start_id = grid.cell_id(start)
+        end_id = grid.cell_id(end)
+        if start_id == end_id:
+            if steps is not None:
+                steps.emit_path(grid, [start])
+            return [start]
+        # The backward side walks edges in reverse, which needs a free end cell
+        if grid.cells[end_id] == WALL:
+            self.counters = {}
+            if stats is not None:
+                stats.stop()
+            return []
+
+        table = grid.neighbor_table()
+        offsets, ends = table.offsets, table.ends
+        targets, costs = table.targets, table.costs
+        potential = self._potential(start, end, grid.width, stats)
+
+        size = grid.size
+        forward = make_frontier(self.frontier, size)
+        backward = make_frontier(self.frontier, size)
+        if stats is not None:
+            track(forward)
+            track(backward)
+        if steps is not None:
+            observe(forward, steps)
+            observe(backward, steps)
+        cost_forward = array('d', [INF]) * size
+        cost_backward = array('d', [INF]) * size
+        came_from = array('i', [-1]) * size
+        goes_to = array('i', [-1]) * size
+        cost_forward[start_id] = 0
+        cost_backward[end_id] = 0
+        forward.push(start_id, potential(start_id) if potential else 0)
+        backward.push(end_id, -potential(end_id) if potential else 0)
+
+        best = INF
+        meeting = -1
+        while True:
+            top_forward = forward.peek_key()
+            top_backward = backward.peek_key()
+            if top_forward is None or top_backward is None or top_forward + top_backward >= best:
+                break
+
+            # Expand the side whose frontier is currently cheaper
+            if top_forward <= top_backward:
+                frontier, cost_here, cost_there, parents, sign = forward, cost_forward, cost_backward, came_from, 1
+            else:
+                frontier, cost_here, cost_there, parents, sign = backward, cost_backward, cost_forward, goes_to, -1
+            closed = frontier.closed
+            current = frontier.pop()
+
+            current_cost = cost_here[current]
+            for k in range(offsets[current], ends[current]):
+                next_id = targets[k]
+                if closed[next_id]:
+                    continue
+                new_cost = current_cost + costs[k]
+                if new_cost < cost_here[next_id]:
+                    cost_here[next_id] = new_cost
+                    parents[next_id] = current
+                    frontier.push(next_id, new_cost + sign * potential(next_id) if potential else new_cost)
+                    if new_cost + cost_there[next_id] < best:
+                        best = new_cost + cost_there[next_id]
+                        meeting = next_id
+
+        self.counters = {name: forward.counters()[name] + backward.counters()[name]
+                         for name in forward.counters()}
+        if stats is not None:
+            stats.add_frontier(forward)
+            stats.add_frontier(backward)
+            stats.stop()
+        if meeting == -1:
+            return []
+
+        # Join start -> meeting and meeting -> end
+        path = []
+        current = meeting
+        while current != -1:
+            path.append(grid.cell_pos(current))
+            current = came_from[current]
+        path.reverse()
+        current = goes_to[meeting]
+        while current != -1:
+            path.append(grid.cell_pos(current))
+            current = goes_to[current]
+        if steps is not None:
+            steps.emit_path(grid, path)
+        return path
+
+
+class BidirectionalDijkstra(BidirectionalSearch):
+    def __init__(self, grid_size: int, frontier: str = "lazy"):
+        super().__init__(grid_size, frontier, heuristic=None)
+
+
+class BidirectionalAStar(BidirectionalSearch):
+    def __init__(self, grid_size: int, frontier: str = "lazy", heuristic: str = "octile"):
+        super().__init__(grid_size, frontier, heuristic=heuristic)
@@ -0,0 +1,198 @@
+from array import array
+from collections import deque
+from typing import Dict, List, Tuple
+from grid_model import GridModel, WALL, ALL_CELLS
+
+class ComponentIndex:
+    """Connected-component labels of the free cells (8-connected).
+
+    labels[cell] is the component id of a free cell and -1 for walls, so
+    connectivity queries are O(1). Edits are applied locally:
+    - removing a wall unions the components around it, relabelling the
+      smaller ones into the largest (union by size);
+    - adding a wall first checks whether its free neighbors still touch
+      each other around the ring, and only otherwise runs interleaved
+      searches from each side, relabelling the pieces that close off first.
+    """
+
+    def __init__(self, grid: GridModel):
+        self.grid = grid
+        # Fetched before listening so the table's rows are updated before this index sees an edit
+        self.table = grid.neighbor_table()
+        self.labels = array('i', [-1]) * grid.size
+        self.sizes: Dict[int, int] = {}
+        self._next_label = 0
+        self.rebuild()
+        grid.add_listener(self._on_wall_changed)
+
+    def detach(self):
+        self.grid.remove_listener(self._on_wall_changed)
+
+    def rebuild(self):
+        """Label every free cell from scratch"""
+        cells, labels = self.grid.cells, self.labels
+        for cell_id in range(self.grid.size):
+            labels[cell_id] = -1
+        self.sizes.clear()
+        for cell_id in range(self.grid.size):
+            if cells[cell_id] != WALL and labels[cell_id] == -1:
+                label = self._new_label()
+                self.sizes[label] = self._relabel(cell_id, -1, label)
+
+    def component(self, pos: Tuple[int, int]) -> int:
+        """Component id of a cell, -1 for walls"""
+        return self.labels[self.grid.cell_id(pos)]
+
+    def connected(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        label = self.component(a)
+        return label != -1 and label == self.component(b)
+
+    def reachable(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """Whether a search from start can reach end, engines may leave a wall start"""
+        if start == end:
+            return True
+        end_label = self.component(end)
+        if end_label == -1:
+            return False
+        if not self.grid.is_wall(start):
+            return self.component(start) == end_label
+        return any(self.labels[next_id] == end_label for next_id in self._free_neighbors(self.grid.cell_id(start)))
+
+    def _new_label(self) -> int:
+        self._next_label += 1
+        return self._next_label
+
+    def _free_neighbors(self, cell_id: int) -> List[int]:
+        table = self.table
+        targets = table.targets
+        return [targets[k] for k in range(table.offsets[cell_id], table.ends[cell_id])]
+
+    def _relabel(self, seed: int, old: int, new: int) -> int:
+        """Flood from seed over cells labelled old, returns how many were relabelled"""
+        labels = self.labels
+        table = self.table
+        offsets, ends, targets = table.offsets, table.ends, table.targets
+        labels[seed] = new
+        stack = [seed]
+        count = 1
+        while stack:
+            current = stack.pop()
+            for k in range(offsets[current], ends[current]):
+                next_id = targets[k]
+                if labels[next_id] == old:
+                    labels[next_id] = new
+                    stack.append(next_id)
+                    count += 1
+        return count
+
+    def _on_wall_changed(self, cell_id: int, blocked: bool):
+        if cell_id == ALL_CELLS:
+            self.rebuild()
+        elif blocked:
+            self._wall_added(cell_id)
+        else:
+            self._wall_removed(cell_id)
+
+    def _wall_removed(self, cell_id: int):
+        labels, sizes = self.labels, self.sizes
+        around = {labels[next_id]: next_id for next_id in self._free_neighbors(cell_id)}
+        if not around:
+            label = self._new_label()
+            labels[cell_id] = label
+            sizes[label] = 1
+            return
+        largest = max(around, key=sizes.__getitem__)
+        for label, seed in around.items():
+            if label != largest:
+                sizes[largest] += self._relabel(seed, label, largest)
+                del sizes[label]
+        labels[cell_id] = largest
+        sizes[largest] += 1
+
+    def _wall_added(self, cell_id: int):
+        labels, sizes = self.labels, self.sizes
+        old = labels[cell_id]
+        labels[cell_id] = -1
+        sizes[old] -= 1
+        if not sizes[old]:
+            del sizes[old]
+            return
+
+        # Group free neighbors that still touch each other around the ring
+        width = self.grid.width
+        seeds = self._free_neighbors(cell_id)
+        groups: List[List[int]] = []
+        for seed in seeds:
+            y, x = divmod(seed, width)
+            touching = [group for group in groups
+                        if any(max(abs(x - other % width), abs(y - other // width)) <= 1 for other in group)]
+            merged = [seed]
+            for group in touching:
+                merged.extend(group)
+                groups.remove(group)
+            groups.append(merged)
+        if len(groups) <= 1:
+            return
+
+        # Interleaved searches, one per group; a search that runs dry is a separate piece
+        owner: Dict[int, int] = {}
+        parent = list(range(len(groups)))
+        queues = []
+        members = []
+        for index, group in enumerate(groups):
+            queues.append(deque(group))
+            members.append(list(group))
+            for seed in group:
+                owner[seed] = index
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        table = self.table
+        offsets, ends, targets = table.offsets, table.ends, table.targets
+        active = set(range(len(groups)))
+        finished = []
+        while len(active) > 1:
+            for index in list(active):
+                if index not in active:
+                    continue
+                queue = queues[index]
+                current = queue.popleft()
+                for k in range(offsets[current], ends[current]):
+                    next_id = targets[k]
+                    if labels[next_id] != old:
+                        continue
+                    other = owner.get(next_id)
+                    if other is None:
+                        owner[next_id] = index
+                        members[index].append(next_id)
+                        queue.append(next_id)
+                        continue
+                    other = find(other)
+                    if other != index:
+                        # The two searches met, keep going as one
+                        parent[other] = index
+                        queue.extend(queues[other])
+                        members[index].extend(members[other])
+                        queues[other] = members[other] = None
+                        active.discard(other)
+                if not queue:
+                    active.discard(index)
+                    finished.append(index)
+                if len(active) <= 1:
+                    break
+
+        # The search still running keeps the old label, closed-off pieces get new ones
+        for index in finished:
+            if members[index] is None:
+                continue
+            label = self._new_label()
+            for member in members[index]:
+                labels[member] = label
+            sizes[label] = len(members[index])
+            sizes[old] -= len(members[index])
+        if not sizes[old]:
+            del sizes[old]
@@ -0,0 +1,340 @@
+import heapq
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+INF = float('inf')
+
+# Rebuild once incremental fill-in exceeds this fraction of the node count
+REBUILD_FILL_RATIO = 0.25
+
+Node = Hashable
+
+class ContractionHierarchy:
+    """Contraction hierarchy over an undirected weighted graph, kept up to date edge by edge.
+
+    Built the customizable way: contracting a node connects all its
+    higher-ranked neighbors (no witness searches), so the upward arcs form
+    a chordal graph whose shape does not depend on the weights. Arc weights
+    are then customized bottom-up over lower triangles. Because of that:
+    - toggling an existing edge only re-customizes the arcs above it;
+    - adding an edge between unconnected nodes inserts its fill-in arcs first;
+    - new nodes are ranked below every existing one, where a leaf needs no fill.
+
+    Queries walk the upward search space of both ends, which is the chain
+    of elimination-tree ancestors, so they need no priority queue.
+    """
+
+    def __init__(self, weight: Callable[[Node, Node], float]):
+        self.weight = weight
+        self.rank: Dict[Node, int] = {}
+        self.up: Dict[Node, Dict[Node, float]] = {}  # Node -> {higher neighbor: arc weight}
+        self.middle: Dict[Tuple[Node, Node], Node] = {}  # Arc -> contracted node it shortcuts, absent for edges
+        self.down: Dict[Node, Set[Node]] = {}
+        self.parent: Dict[Node, Optional[Node]] = {}  # Elimination-tree parent, the lowest-ranked up neighbor
+        self.edges: Dict[Tuple[Node, Node], float] = {}  # Original edges (low, high) and their weights
+        self.fill_arcs = 0  # Arcs added by incremental updates, for deciding when to rebuild
+        self._lowest = 0
+
+    def __contains__(self, node: Node) -> bool:
+        return node in self.rank
+
+    def __len__(self) -> int:
+        return len(self.rank)
+
+    @property
+    def stale(self) -> bool:
+        """Whether incremental updates added enough fill that a fresh order would pay off"""
+        return self.fill_arcs > REBUILD_FILL_RATIO * max(len(self.rank), 64)
+
+    def build(self, graph: Dict[Node, Iterable[Node]]):
+        """Order, contract and customize a whole graph given as {node: neighbors}"""
+        self.rank.clear()
+        self.up.clear()
+        self.middle.clear()
+        self.down.clear()
+        self.parent.clear()
+        self.edges.clear()
+        self.fill_arcs = 0
+        neighbors = {node: set(adjacent) for node, adjacent in graph.items()}
+        for node, adjacent in list(neighbors.items()):
+            adjacent.discard(node)
+            for other in adjacent:
+                neighbors.setdefault(other, set()).add(node)
+
+        for rank, node in enumerate(self._contraction_order(neighbors)):
+            self.rank[node] = rank
+            self.up[node] = {}
+            self.down[node] = set()
+            self.parent[node] = None
+        self._lowest = 0
+
+        # Eliminate in rank order, connecting the higher neighbors of each node
+        remaining = {node: set(adjacent) for node, adjacent in neighbors.items()}
+        for node in sorted(self.rank, key=self.rank.__getitem__):
+            higher = remaining.pop(node)
+            for other in higher:
+                remaining[other].discard(node)
+                self._add_arc(node, other)
+            higher = list(higher)
+            for i, a in enumerate(higher):
+                for b in higher[i + 1:]:
+                    if b not in remaining[a]:
+                        remaining[a].add(b)
+                        remaining[b].add(a)
+
+        for node, adjacent in neighbors.items():
+            for other in adjacent:
+                key = self._key(node, other)
+                if key not in self.edges:
+                    self.edges[key] = self.weight(*key)
+        self.customize()
+
+    def _contraction_order(self, neighbors: Dict[Node, Set[Node]]) -> List[Node]:
+        """Greedy order by fill-in minus degree plus level, which keeps the hierarchy shallow"""
+        remaining = {node: set(adjacent) for node, adjacent in neighbors.items()}
+        level = dict.fromkeys(remaining, 0)
+
+        def priority(node):
+            adjacent = list(remaining[node])
+            fill = 0
+            for i, a in enumerate(adjacent):
+                around = remaining[a]
+                for b in adjacent[i + 1:]:
+                    if b not in around:
+                        fill += 1
+            return fill - len(adjacent) + level[node]
+
+        heap = [(priority(node), i, node) for i, node in enumerate(remaining)]
+        heapq.heapify(heap)
+        counter = len(heap)
+        order = []
+        while heap:
+            key, _, node = heapq.heappop(heap)
+            if node not in remaining:
+                continue
+            current = priority(node)
+            if current > key:
+                # Lazy update, requeue with the fresh priority
+                heapq.heappush(heap, (current, counter, node))
+                counter += 1
+                continue
+            order.append(node)
+            adjacent = remaining.pop(node)
+            for other in adjacent:
+                remaining[other].discard(node)
+                level[other] = max(level[other], level[node] + 1)
+            adjacent = list(adjacent)
+            for i, a in enumerate(adjacent):
+                for b in adjacent[i + 1:]:
+                    remaining[a].add(b)
+                    remaining[b].add(a)
+            for other in adjacent:
+                heapq.heappush(heap, (priority(other), counter, other))
+                counter += 1
+        return order
+
+    def _key(self, a: Node, b: Node) -> Tuple[Node, Node]:
+        return (a, b) if self.rank[a] < self.rank[b] else (b, a)
+
+    def _add_arc(self, low: Node, high: Node) -> bool:
+        if high in self.up[low]:
+            return False
+        self.up[low][high] = INF
+        self.down[high].add(low)
+        parent = self.parent[low]
+        if parent is None or self.rank[high] < self.rank[parent]:
+            self.parent[low] = high
+        return True
+
+    def add_node(self, node: Node):
+        """Rank a new node below every other one"""
+        if node in self.rank:
+            return
+        self._lowest -= 1
+        self.rank[node] = self._lowest
+        self.up[node] = {}
+        self.down[node] = set()
+        self.parent[node] = None
+
+    def connect(self, a: Node, b: Node):
+        """Add or re-weight the edge a-b"""
+        if a == b:
+            return
+        self.add_node(a)
+        self.add_node(b)
+        key = self._key(a, b)
+        self.edges[key] = self.weight(a, b)
+        changed = [key]
+        # Keep the upper neighbors of every node a clique, starting from the new arc
+        stack = [key]
+        while stack:
+            low, high = stack.pop()
+            if not self._add_arc(low, high):
+                continue
+            self.fill_arcs += 1
+            changed.append((low, high))
+            for other in self.up[low]:
+                if other != high:
+                    stack.append(self._key(high, other))
+        self._propagate(changed)
+
+    def disconnect(self, a: Node, b: Node):
+        """Remove the edge a-b, its arcs stay with an infinite base weight"""
+        if a not in self.rank or b not in self.rank:
+            return
+        key = self._key(a, b)
+        if self.edges.pop(key, None) is not None:
+            self._propagate([key])
+
+    def _recompute(self, low: Node, high: Node) -> bool:
+        """Cheapest of the edge and every lower triangle for one arc, returns whether it changed"""
+        weight = self.edges.get((low, high), INF)
+        middle = None
+        up = self.up
+        down_high = self.down[high]
+        for node in self.down[low]:
+            if node in down_high:
+                arcs = up[node]
+                cost = arcs[low] + arcs[high]
+                if cost < weight:
+                    weight, middle = cost, node
+        old = up[low][high]
+        up[low][high] = weight
+        if middle is None:
+            self.middle.pop((low, high), None)
+        else:
+            self.middle[(low, high)] = middle
+        return weight != old
+
+    def customize(self):
+        """Recompute every arc weight, for when all edge weights changed"""
+        for node in sorted(self.rank, key=self.rank.__getitem__):
+            for other in self.up[node]:
+                self._recompute(node, other)
+
+    def reweigh(self):
+        """Fetch every edge weight again and re-customize"""
+        for key in self.edges:
+            self.edges[key] = self.weight(*key)
+        self.customize()
+
+    def _propagate(self, arcs: Iterable[Tuple[Node, Node]]):
+        """Re-customize the given arcs and every arc whose lower triangles they are part of"""
+        rank = self.rank
+        heap = []
+        queued = set()
+        counter = 0
+        for arc in arcs:
+            if arc not in queued:
+                queued.add(arc)
+                heap.append((rank[arc[0]], counter, arc))
+                counter += 1
+        heapq.heapify(heap)
+        while heap:
+            _, _, arc = heapq.heappop(heap)
+            queued.discard(arc)
+            low, high = arc
+            if not self._recompute(low, high):
+                continue
+            # low is the lowest corner of every triangle this arc closes
+            for other in self.up[low]:
+                if other != high:
+                    dependent = self._key(high, other)
+                    if dependent not in queued:
+                        queued.add(dependent)
+                        heapq.heappush(heap, (rank[dependent[0]], counter, dependent))
+                        counter += 1
+
+    def _upward(self, source: Node) -> Tuple[Dict[Node, float], Dict[Node, Node]]:
+        """Distances over upward arcs from source, walking its elimination-tree ancestors in rank order"""
+        distance = {source: 0.0}
+        previous = {}
+        node = source
+        up, parent = self.up, self.parent
+        while node is not None:
+            cost = distance.get(node, INF)
+            if cost < INF:
+                for other, weight in up[node].items():
+                    new_cost = cost + weight
+                    if new_cost < distance.get(other, INF):
+                        distance[other] = new_cost
+                        previous[other] = node
+            node = parent[node]
+        return distance, previous
+
+    def _meet(self, source: Node, target: Node):
+        forward, forward_previous = self._upward(source)
+        backward, backward_previous = self._upward(target)
+        best, meeting = INF, None
+        for node, cost in forward.items():
+            other = backward.get(node)
+            if other is not None and cost + other < best:
+                best, meeting = cost + other, node
+        return best, meeting, forward_previous, backward_previous
+
+    def distance(self, source: Node, target: Node) -> float:
+        """Shortest distance between two nodes, inf if either is unknown or they are not connected"""
+        if source == target:
+            return 0.0
+        if source not in self.rank or target not in self.rank:
+            return INF
+        return self._meet(source, target)[0]
+
+    def many_to_many(self, sources: List[Node], targets: List[Node]) -> List[List[float]]:
+        """Distance table between two node lists, one upward walk per node.
+
+        The upward spaces of the targets are bucketed by node, so each
+        source only scans the buckets on its own upward space.
+        """
+        buckets: Dict[Node, List[Tuple[int, float]]] = {}
+        for j, target in enumerate(targets):
+            if target in self.rank:
+                for node, cost in self._upward(target)[0].items():
+                    buckets.setdefault(node, []).append((j, cost))
+        table = []
+        for source in sources:
+            row = [INF] * len(targets)
+            if source in self.rank:
+                for node, cost in self._upward(source)[0].items():
+                    for j, other in buckets.get(node, ()):
+                        if cost + other < row[j]:
+                            row[j] = cost + other
+            for j, target in enumerate(targets):
+                if target == source:
+                    row[j] = 0.0
+            table.append(row)
+        return table
+
+    def path(self, source: Node, target: Node) -> Optional[List[Node]]:
+        """Node path from source to target with shortcuts unpacked, None if there is none"""
+        if source == target:
+            return [source]
+        if source not in self.rank or target not in self.rank:
+            return None
+        best, meeting, forward_previous, backward_previous = self._meet(source, target)
+        if meeting is None:
+            return None
+        up_chain = [meeting]
+        while up_chain[-1] != source:
+            up_chain.append(forward_previous[up_chain[-1]])
+        up_chain.reverse()
+        down_chain = [meeting]
+        while down_chain[-1] != target:
+            down_chain.append(backward_previous[down_chain[-1]])
+
+        path = [source]
+        for chain in (up_chain, down_chain):
+            for a, b in zip(chain, chain[1:]):
+                self._unpack(a, b, path)
+        return path
+
+    def _unpack(self, a: Node, b: Node, path: List[Node]):
+        """Append the original nodes after a on the arc a-b, ending with b"""
+        stack = [(a, b)]
+        while stack:
+            a, b = stack.pop()
+            middle = self.middle.get(self._key(a, b))
+            if middle is None:
+                path.append(b)
+            else:
+                stack.append((middle, b))
+                stack.append((a, middle))
@@ -1,59 +1,194 @@
-from typing import List, Set, Dict, Tuple
-import heapq
+from typing import Iterable, List, Optional, Sequence, Set, Tuple, Union
+from array import array
+from grid_model import GridModel, as_grid_model, reconstruct_path
+from frontier import make_frontier, track
+from stats import SearchStats
+from steps import StepRecorder, observe
+
+INF = float('inf')
 
 class Dijkstra:
-    def __init__(self, grid_size: int):
+    def __init__(self, grid_size: int, frontier: str = "lazy"):
         self.grid_size = grid_size
+        self.frontier = frontier
+        self.counters = {}  # Frontier counters of the last search
+        self.explored = None  # Closed set of the last search, used for cache invalidation
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  walls: Union[GridModel, Set[Tuple[int, int]]],
+                  stats: Optional[SearchStats] = None,
+                  steps: Optional[StepRecorder] = None) -> List[Tuple[int, int]]:
+        """Find shortest path using Dijkstra's algorithm, filling stats and emitting steps if they are given"""
+        if stats is not None:
+            stats.start()
+        grid = as_grid_model(self.grid_size, walls)
+        table = grid.neighbor_table()
+        offsets, ends = table.offsets, table.ends
+        targets, costs = table.targets, table.costs
+        start_id = grid.cell_id(start)
+        end_id = grid.cell_id(end)
+
+        frontier = make_frontier(self.frontier, grid.size)
+        if stats is not None:
+            track(frontier)
+        if steps is not None:
+            observe(frontier, steps)
+        closed = frontier.closed
+        frontier.push(start_id, 0)
+
+        # Per-cell search state indexed by cell id
+        came_from = array('i', [-1]) * grid.size
+        cost_so_far = array('d', [INF]) * grid.size
+        cost_so_far[start_id] = 0
 
-    def get_neighbors(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
-        """Returns valid neighboring positions"""
-        x, y = pos
-        neighbors = []
-        
-        # Check all 8 surrounding positions (including diagonals)
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]:
-            new_x, new_y = x + dx, y + dy
-            if 0 <= new_x < self.grid_size and 0 <= new_y < self.grid_size:
-                neighbors.append((new_x, new_y))
-        return neighbors
-
-    def find_path(self, start: Tuple[int, int], end: Tuple[int, int], walls: Set[Tuple[int, int]]) -> List[Tuple[int, int]]:
-        """Find shortest path using Dijkstra's algorithm"""
-        frontier = []
-        heapq.heappush(frontier, (0, start))
-        
-        came_from: Dict[Tuple[int, int], Tuple[int, int]] = {}
-        cost_so_far: Dict[Tuple[int, int], float] = {}
-        
-        came_from[start] = None
-        cost_so_far[start] = 0
-
-        while frontier:
-            current = heapq.heappop(frontier)[1]
-
-            if current == end:
+        while True:
+            current = frontier.pop()  # Closes current, stale entries are skipped
+            if current == -1:
                 break
 
-            for next_pos in self.get_neighbors(current):
-                if next_pos in walls:
+            if current == end_id:
+                break
+
+            current_cost = cost_so_far[current]
+            for k in range(offsets[current], ends[current]):
+                next_id = targets[k]
+                if closed[next_id]:
                     continue
 
-                # Diagonal movement costs more (√2 ≈ 1.414)
-                is_diagonal = abs(next_pos[0] - current[0]) == 1 and abs(next_pos[1] - current[1]) == 1
-                new_cost = cost_so_far[current] + (1.414 if is_diagonal else 1.0)
+                # Edge costs come precomputed from the neighbor table (diagonals cost 1.414)
+                new_cost = current_cost + costs[k]
 
-                if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
-                    cost_so_far[next_pos] = new_cost
+                if new_cost < cost_so_far[next_id]:
+                    cost_so_far[next_id] = new_cost
                     priority = new_cost  # Priority is just the cost (no heuristic)
-                    heapq.heappush(frontier, (priority, next_pos))
-                    came_from[next_pos] = current
-
-        # Reconstruct path
-        path = []
-        current = end
-        while current is not None:
-            path.append(current)
-            current = came_from.get(current)
-        
-        path.reverse()
-        return path if path[0] == start else []
\ No newline at end of file
+                    frontier.push(next_id, priority)
+                    came_from[next_id] = current
+
+        self.counters = frontier.counters()
+        self.explored = closed
+        if stats is not None:
+            stats.add_frontier(frontier)
+            stats.stop()
+        path = reconstruct_path(grid, came_from, start_id, end_id)
+        if steps is not None:
+            steps.emit_path(grid, path)
+        return path
+
+    def find_nearest(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]],
+                     walls: Union[GridModel, Set[Tuple[int, int]]],
+                     stats: Optional[SearchStats] = None,
+                     steps: Optional[StepRecorder] = None) -> Tuple[Optional[Tuple[int, int]], List[Tuple[int, int]], float]:
+        """Find the goal with the cheapest path in one search, returns (goal, path, cost).
+
+        The first goal closed is the nearest one. Returns (None, [], inf) if
+        no goal is reachable.
+        """
+        if stats is not None:
+            stats.start()
+        grid = as_grid_model(self.grid_size, walls)
+        table = grid.neighbor_table()
+        offsets, ends = table.offsets, table.ends
+        targets, costs = table.targets, table.costs
+        is_goal = bytearray(grid.size)
+        for goal in goals:
+            is_goal[grid.cell_id(goal)] = 1
+        start_id = grid.cell_id(start)
+
+        frontier = make_frontier(self.frontier, grid.size)
+        if stats is not None:
+            track(frontier)
+        if steps is not None:
+            observe(frontier, steps)
+        closed = frontier.closed
+        if any(is_goal):
+            frontier.push(start_id, 0)
+
+        # Per-cell search state indexed by cell id
+        came_from = array('i', [-1]) * grid.size
+        cost_so_far = array('d', [INF]) * grid.size
+        cost_so_far[start_id] = 0
+        end_id = -1
+
+        while True:
+            current = frontier.pop()  # Closes current, stale entries are skipped
+            if current == -1:
+                break
+
+            if is_goal[current]:
+                end_id = current
+                break
+
+            current_cost = cost_so_far[current]
+            for k in range(offsets[current], ends[current]):
+                next_id = targets[k]
+                if closed[next_id]:
+                    continue
+
+                new_cost = current_cost + costs[k]
+
+                if new_cost < cost_so_far[next_id]:
+                    cost_so_far[next_id] = new_cost
+                    frontier.push(next_id, new_cost)
+                    came_from[next_id] = current
+
+        self.counters = frontier.counters()
+        self.explored = closed
+        if stats is not None:
+            stats.add_frontier(frontier)
+            stats.stop()
+        if end_id == -1:
+            return None, [], INF
+        path = reconstruct_path(grid, came_from, start_id, end_id)
+        if steps is not None:
+            steps.emit_path(grid, path)
+        return grid.cell_pos(end_id), path, cost_so_far[end_id]
+
+    def distances(self, start: Tuple[int, int], targets: Sequence[Tuple[int, int]],
+                  walls: Union[GridModel, Set[Tuple[int, int]]]) -> array:
+        """Path costs from start to every target in one search, inf where unreachable.
+
+        The search stops as soon as the last target is closed.
+        """
+        grid = as_grid_model(self.grid_size, walls)
+        table = grid.neighbor_table()
+        offsets, ends = table.offsets, table.ends
+        next_ids, costs = table.targets, table.costs
+        result = array('d', [INF]) * len(targets)
+        # Cell id -> indexes into targets, several targets may share a cell
+        wanted = {}
+        for index, target in enumerate(targets):
+            wanted.setdefault(grid.cell_id(target), []).append(index)
+        if not wanted:
+            return result
+
+        frontier = make_frontier(self.frontier, grid.size)
+        closed = frontier.closed
+        start_id = grid.cell_id(start)
+        cost_so_far = array('d', [INF]) * grid.size
+        cost_so_far[start_id] = 0
+        frontier.push(start_id, 0)
+        remaining = len(wanted)
+
+        while remaining:
+            current = frontier.pop()
+            if current == -1:
+                break
+
+            current_cost = cost_so_far[current]
+            hit = wanted.get(current)
+            if hit is not None:
+                for index in hit:
+                    result[index] = current_cost
+                remaining -= 1
+
+            for k in range(offsets[current], ends[current]):
+                next_id = next_ids[k]
+                if closed[next_id]:
+                    continue
+                new_cost = current_cost + costs[k]
+                if new_cost < cost_so_far[next_id]:
+                    cost_so_far[next_id] = new_cost
+                    frontier.push(next_id, new_cost)
+
+        self.counters = frontier.counters()
+        return result
@@ -0,0 +1,153 @@
+from array import array
+from collections import OrderedDict
+from typing import List, Optional, Set, Tuple, Union
+from grid_model import GridModel, WALL, as_grid_model
+from frontier import make_frontier, track
+from stats import SearchStats
+from steps import StepRecorder, observe
+
+INF = float('inf')
+
+class FlowField:
+    """Distance and next-step fields toward one goal, built by a reverse Dijkstra.
+
+    distance[cell] is the path cost from cell to the goal (inf if unreachable),
+    next_step[cell] is the neighbor to move to, or -1 at the goal and on
+    unreachable cells. Reading a path off the field costs O(path length).
+    """
+
+    def __init__(self, grid: GridModel, goal: Tuple[int, int], frontier: str = "lazy",
+                 stats: Optional[SearchStats] = None, steps: Optional[StepRecorder] = None):
+        self.grid = grid
+        self.goal = goal
+        self.version = grid.version
+        self.distance = array('d', [INF]) * grid.size
+        self.next_step = array('i', [-1]) * grid.size
+        self.max_distance = 0.0  # Largest finite distance, used to scale heatmaps
+        self.counters = {}
+        goal_id = grid.cell_id(goal)
+        if grid.cells[goal_id] != WALL:
+            self._build(goal_id, frontier, stats, steps)
+
+    def _build(self, goal_id: int, frontier_kind: str, stats: Optional[SearchStats] = None,
+               steps: Optional[StepRecorder] = None):
+        table = self.grid.neighbor_table()
+        offsets, ends = table.offsets, table.ends
+        targets, costs = table.targets, table.costs
+        distance, next_step = self.distance, self.next_step
+
+        frontier = make_frontier(frontier_kind, self.grid.size)
+        if stats is not None:
+            track(frontier)
+        if steps is not None:
+            observe(frontier, steps)
+        closed = frontier.closed
+        distance[goal_id] = 0
+        frontier.push(goal_id, 0)
+        while True:
+            current = frontier.pop()
+            if current == -1:
+                break
+            current_cost = distance[current]
+            self.max_distance = current_cost  # Pops come out in non-decreasing order
+            # Moves are symmetric between free cells, so walking rows backwards is valid
+            for k in range(offsets[current], ends[current]):
+                next_id = targets[k]
+                if closed[next_id]:
+                    continue
+                new_cost = current_cost + costs[k]
+                if new_cost < distance[next_id]:
+                    distance[next_id] = new_cost
+                    next_step[next_id] = current
+                    frontier.push(next_id, new_cost)
+        self.counters = frontier.counters()
+        if stats is not None:
+            stats.add_frontier(frontier)
+
+    def cost_from(self, start: Tuple[int, int]) -> float:
+        """Path cost from start to the goal, inf if unreachable"""
+        if start == self.goal:
+            return 0.0
+        start_id = self.grid.cell_id(start)
+        if self.grid.cells[start_id] == WALL:
+            return self._leave_wall(start_id)[0]
+        return self.distance[start_id]
+
+    def _leave_wall(self, start_id: int) -> Tuple[float, int]:
+        """Best (total cost, neighbor) out of a wall cell, which the field does not cover"""
+        table = self.grid.neighbor_table()
+        distance = self.distance
+        best_cost, best_id = INF, -1
+        for k in range(table.offsets[start_id], table.ends[start_id]):
+            total = table.costs[k] + distance[table.targets[k]]
+            if total < best_cost:
+                best_cost, best_id = total, table.targets[k]
+        return best_cost, best_id
+
+    def path_from(self, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Follow next_step from start to the goal"""
+        if start == self.goal:
+            return [start]
+        grid = self.grid
+        current = grid.cell_id(start)
+        path = [start]
+        if grid.cells[current] == WALL:
+            # Engines let a search leave a wall start cell, so do the same here
+            cost, current = self._leave_wall(current)
+            if cost == INF:
+                return []
+            path.append(grid.cell_pos(current))
+        elif self.distance[current] == INF:
+            return []
+        goal_id = grid.cell_id(self.goal)
+        next_step = self.next_step
+        while current != goal_id:
+            current = next_step[current]
+            path.append(grid.cell_pos(current))
+        return path
+
+
+class FlowFieldSearch:
+    """Engine answering find_path from cached flow fields, one per (goal, wall version)"""
+
+    def __init__(self, grid_size: int, frontier: str = "lazy", max_fields: int = 8):
+        self.grid_size = grid_size
+        self.frontier = frontier
+        self.max_fields = max_fields
+        self.counters = {}  # Frontier counters of the field that answered the last query
+        self._grid: Optional[GridModel] = None
+        self._fields: "OrderedDict[Tuple[Tuple[int, int], int], FlowField]" = OrderedDict()
+
+    def flow_field(self, grid: GridModel, goal: Tuple[int, int],
+                   stats: Optional[SearchStats] = None, steps: Optional[StepRecorder] = None) -> FlowField:
+        """Returns the field for goal on the current walls, building it on a miss"""
+        if grid is not self._grid:
+            self._grid = grid
+            self._fields.clear()
+        key = (goal, grid.version)
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            return field
+        field = FlowField(grid, goal, self.frontier, stats, steps)
+        self._fields[key] = field
+        while len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        return field
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  walls: Union[GridModel, Set[Tuple[int, int]]],
+                  stats: Optional[SearchStats] = None,
+                  steps: Optional[StepRecorder] = None) -> List[Tuple[int, int]]:
+        """Find path by reading it off the flow field toward end, a cached field counts as no expansions"""
+        if stats is not None:
+            stats.start()
+        grid = as_grid_model(self.grid_size, walls)
+        field = self.flow_field(grid, end, stats, steps)
+        self.counters = field.counters
+        path = field.path_from(start)
+        if steps is not None:
+            steps.emit_path(grid, path)
+        if stats is not None:
+            stats.stop()
+        return path
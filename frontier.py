@@ -0,0 +1,201 @@
+from array import array
+from typing import Dict
+import heapq
+
+class LazyHeap:
+    """heapq frontier with lazy deletion.
+
+    Improving a cell pushes a duplicate entry; entries for cells that are
+    already closed are skipped on pop and counted as stale pops.
+    """
+
+    def __init__(self, size: int):
+        self.heap = []
+        self.closed = bytearray(size)
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.decrease_keys = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, item: int, priority):
+        heapq.heappush(self.heap, (priority, item))
+        self.pushes += 1
+
+    def pop(self) -> int:
+        """Returns the best open item and closes it, -1 when the frontier is empty"""
+        heap = self.heap
+        closed = self.closed
+        while heap:
+            item = heapq.heappop(heap)[1]
+            self.pops += 1
+            if closed[item]:
+                self.stale_pops += 1
+                continue
+            closed[item] = 1
+            return item
+        return -1
+
+    def peek_key(self):
+        """Returns the best open priority without popping it, None when empty"""
+        heap = self.heap
+        closed = self.closed
+        while heap and closed[heap[0][1]]:
+            heapq.heappop(heap)
+            self.pops += 1
+            self.stale_pops += 1
+        return heap[0][0] if heap else None
+
+    def counters(self) -> Dict[str, int]:
+        return {"pushes": self.pushes, "pops": self.pops,
+                "stale_pops": self.stale_pops, "decrease_keys": self.decrease_keys}
+
+
+class IndexedHeap:
+    """Binary heap with a position index, giving real decrease-key.
+
+    Each item is in the heap at most once, so there are never stale pops.
+    """
+
+    def __init__(self, size: int):
+        self.items = []
+        self.keys = []
+        self.index = array('i', [-1]) * size
+        self.closed = bytearray(size)
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.decrease_keys = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, item: int) -> bool:
+        return self.index[item] != -1
+
+    def push(self, item: int, priority):
+        """Insert item, or lower its priority if it is already queued"""
+        i = self.index[item]
+        if i == -1:
+            self.items.append(item)
+            self.keys.append(priority)
+            self.pushes += 1
+            self._sift_up(len(self.items) - 1)
+        elif priority < self.keys[i]:
+            self.keys[i] = priority
+            self.decrease_keys += 1
+            self._sift_up(i)
+        elif priority > self.keys[i]:
+            self.keys[i] = priority
+            self._sift_down(i)
+
+    def pop(self) -> int:
+        """Returns the best item and closes it, -1 when the frontier is empty"""
+        items = self.items
+        if not items:
+            return -1
+        self.pops += 1
+        item = items[0]
+        self._remove_at(0)
+        self.closed[item] = 1
+        return item
+
+    def peek_key(self):
+        """Returns the best priority without popping it, None when empty"""
+        return self.keys[0] if self.keys else None
+
+    def remove(self, item: int):
+        """Drop item from the heap without closing it"""
+        i = self.index[item]
+        if i != -1:
+            self._remove_at(i)
+
+    def counters(self) -> Dict[str, int]:
+        return {"pushes": self.pushes, "pops": self.pops,
+                "stale_pops": self.stale_pops, "decrease_keys": self.decrease_keys}
+
+    def _remove_at(self, i: int):
+        items, keys, index = self.items, self.keys, self.index
+        index[items[i]] = -1
+        last_item = items.pop()
+        last_key = keys.pop()
+        if i < len(items):
+            items[i] = last_item
+            keys[i] = last_key
+            index[last_item] = i
+            self._sift_down(i)
+            self._sift_up(i)
+
+    def _sift_up(self, i: int):
+        items, keys, index = self.items, self.keys, self.index
+        item, key = items[i], keys[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not key < keys[parent]:
+                break
+            items[i] = items[parent]
+            keys[i] = keys[parent]
+            index[items[i]] = i
+            i = parent
+        items[i] = item
+        keys[i] = key
+        index[item] = i
+
+    def _sift_down(self, i: int):
+        items, keys, index = self.items, self.keys, self.index
+        n = len(items)
+        item, key = items[i], keys[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[child + 1] < keys[child]:
+                child += 1
+            if not keys[child] < key:
+                break
+            items[i] = items[child]
+            keys[i] = keys[child]
+            index[items[i]] = i
+            i = child
+        items[i] = item
+        keys[i] = key
+        index[item] = i
+
+
+# Frontier implementations selectable by name on every engine
+FRONTIERS = {
+    "lazy": LazyHeap,
+    "indexed": IndexedHeap,
+}
+
+def make_frontier(kind: str, size: int):
+    if kind not in FRONTIERS:
+        raise ValueError(f"Unknown frontier '{kind}', expected one of {sorted(FRONTIERS)}")
+    return FRONTIERS[kind](size)
+
+def track(frontier):
+    """Instrument one frontier to record peak_size and labelled (distinct items pushed).
+
+    The tracking push shadows push on this instance only, so untracked
+    frontiers keep the plain method; untrack() restores it.
+    """
+    push = frontier.push
+    seen = bytearray(len(frontier.closed))
+    frontier.peak_size = len(frontier)
+    frontier.labelled = 0
+
+    def tracked_push(item: int, priority):
+        push(item, priority)
+        if not seen[item]:
+            seen[item] = 1
+            frontier.labelled += 1
+        if len(frontier) > frontier.peak_size:
+            frontier.peak_size = len(frontier)
+
+    frontier.push = tracked_push
+    return frontier
+
+def untrack(frontier):
+    frontier.__dict__.pop("push", None)
@@ -1,6 +1,9 @@
 import pygame
-import time
 from pathfinder import PathFinder
+from grid_model import GridModel, ALL_CELLS, WALL
+from steps import VISIT, PATH, decode
+from animation import Animation, DEFAULT_SPEED, TARGET_FPS
+import array_render
 
 class GridGUI:
     def __init__(self, window_size, grid_size):
@@ -21,8 +24,10 @@ class GridGUI:
         self.path = []
         self.start_pos = None
         self.end_pos = None
-        self.walls = set()
+        self.grid = GridModel(grid_size)  # Occupancy shared with the pathfinder
         self.last_wall_pos = None  # Add this to track last wall position
+        self.show_heatmap = False  # Toggled with H, shades cells by flow-field distance to the end
+        self.last_engine = None  # Engine of the last run, "lpa" keeps the path live across wall edits
 
         # Colors
         self.WHITE = (255, 255, 255)
@@ -34,30 +39,255 @@ class GridGUI:
         self.LIGHT_BLUE = (100, 100, 255)
         self.YELLOW = (255, 255, 0)
         self.DARK_BLUE = (0, 0, 150)
+        self.HEAT_NEAR = (255, 230, 120)
+        self.HEAT_FAR = (120, 0, 160)
 
         # Setup display
         self.screen = pygame.display.set_mode((self.WINDOW_SIZE, self.WINDOW_SIZE + self.MENU_HEIGHT))
-        pygame.display.set_caption("Pathfinding Visualization")
+        self.CAPTION = "Pathfinding Visualization"
+        pygame.display.set_caption(self.CAPTION)
+        self.clock = pygame.time.Clock()
 
         # Menu setup
-        self.MENU_OPTIONS = ["Select Start", "Select End", "Select Wall", "A* Path", "Dijkstra", "Clear All"]
+        self.MENU_OPTIONS = ["Select Start", "Select End", "Select Wall", "A* Path", "Dijkstra", "JPS", "LPA*", "HPA*", "Clear All"]
         self.selected_option = 0
         self.font = pygame.font.Font(None, 24)
 
         # Initialize pathfinder
-        self.pathfinder = PathFinder(grid_size)
+        self.pathfinder = PathFinder(grid_size, self.grid)
+
+        # Rendering: grid lines and walls live on a cached layer and only dirty cells are repainted
+        self.static_layer = None
+        self.dirty_cells = set()
+        self.menu_dirty = False
+        self.needs_full_redraw = True
+        self.glyphs = {}  # Rendered path numbers
+        self._path_numbers = {}
+        self._path_numbers_key = None
+        self.grid.add_listener(self._on_wall_changed)
+
+        # Large grids are drawn from a NumPy state array in one blit instead of cell by cell
+        self.array_renderer = None
+        if array_render.should_use(grid_size):
+            self.array_renderer = array_render.ArrayRenderer(
+                grid_size, self.CELL_SIZE, (0, self.MENU_HEIGHT),
+                [self.WHITE, self.BLACK, self.LIGHT_BLUE, self.DARK_BLUE, self.YELLOW, self.GREEN, self.RED],
+                line_color=self.GRAY)
+
+        # Running animation, its search happens on a worker thread
+        self.animation = None
+        self.on_animation_item = None
+        self.on_animation_done = None
 
     def draw_cell(self, pos, color):
-        """Draw a single cell at the given position"""
+        """Draw a single cell at the given position, leaving its grid lines visible"""
         if 0 <= pos[0] < self.GRID_SIZE and 0 <= pos[1] < self.GRID_SIZE:
-            rect = (pos[0] * self.CELL_SIZE, 
-                   pos[1] * self.CELL_SIZE + self.MENU_HEIGHT,
-                   self.CELL_SIZE - 1, 
-                   self.CELL_SIZE - 1)
+            rect = (pos[0] * self.CELL_SIZE + 1,
+                   pos[1] * self.CELL_SIZE + self.MENU_HEIGHT + 1,
+                   self.CELL_SIZE - 2,
+                   self.CELL_SIZE - 2)
             pygame.draw.rect(self.screen, color, rect)
 
+    def cell_rect(self, pos):
+        """Screen rectangle of a cell, grid lines included"""
+        return pygame.Rect(pos[0] * self.CELL_SIZE, pos[1] * self.CELL_SIZE + self.MENU_HEIGHT,
+                           self.CELL_SIZE, self.CELL_SIZE)
+
+    def number_glyph(self, number):
+        """Rendered path number, cached since the same numbers are drawn every frame"""
+        glyph = self.glyphs.get(number)
+        if glyph is None:
+            glyph = self.font.render(str(number), True, self.BLACK)
+            self.glyphs[number] = glyph
+        return glyph
+
+    def build_static_layer(self):
+        """Pre-render the background, walls and grid lines"""
+        layer = pygame.Surface((self.WINDOW_SIZE, self.WINDOW_SIZE))
+        layer.fill(self.WHITE)
+        for x, y in self.grid.iter_walls():
+            pygame.draw.rect(layer, self.BLACK, (x * self.CELL_SIZE + 1, y * self.CELL_SIZE + 1,
+                                                 self.CELL_SIZE - 2, self.CELL_SIZE - 2))
+        for x in range(0, self.WINDOW_SIZE, self.CELL_SIZE):
+            pygame.draw.line(layer, self.GRAY, (x, 0), (x, self.WINDOW_SIZE))
+        for y in range(0, self.WINDOW_SIZE, self.CELL_SIZE):
+            pygame.draw.line(layer, self.GRAY, (0, y), (self.WINDOW_SIZE, y))
+        self.static_layer = layer
+
+    def _on_wall_changed(self, cell_id, blocked):
+        """Keep the static layer in sync with wall edits"""
+        if cell_id == ALL_CELLS:
+            self.static_layer = None
+            self.redraw_all()
+            return
+        x, y = self.grid.cell_pos(cell_id)
+        if self.static_layer is not None:
+            pygame.draw.rect(self.static_layer, self.BLACK if blocked else self.WHITE,
+                             (x * self.CELL_SIZE + 1, y * self.CELL_SIZE + 1, self.CELL_SIZE - 2, self.CELL_SIZE - 2))
+        self.mark_dirty((x, y))
+
+    def mark_dirty(self, *cells):
+        """Queue cells for repainting on the next render, None entries are ignored"""
+        for cell in cells:
+            if cell is not None:
+                self.dirty_cells.add(cell)
+
+    def redraw_all(self):
+        """Repaint the whole window on the next render, for changes that touch many cells"""
+        self.needs_full_redraw = True
+
+    def render(self):
+        """Push changes to the display, only the dirty rectangles unless a full redraw is pending"""
+        if self.array_renderer is not None:
+            self.render_array()
+            return
+        if self.needs_full_redraw:
+            self.draw_menu()
+            self.draw_grid()
+            pygame.display.flip()
+            self.needs_full_redraw = False
+            self.menu_dirty = False
+            self.dirty_cells.clear()
+            return
+        rects = []
+        if self.menu_dirty:
+            self.draw_menu()
+            rects.append(pygame.Rect(0, 0, self.WINDOW_SIZE, self.MENU_HEIGHT))
+            self.menu_dirty = False
+        for cell in self.dirty_cells:
+            if 0 <= cell[0] < self.GRID_SIZE and 0 <= cell[1] < self.GRID_SIZE:
+                rects.append(self.paint_cell(cell))
+        self.dirty_cells.clear()
+        if rects:
+            pygame.display.update(rects)
+
+    def render_array(self):
+        """Array renderer counterpart of render, dirty cells update the state array"""
+        renderer = self.array_renderer
+        if not (self.needs_full_redraw or self.menu_dirty or self.dirty_cells):
+            return
+        if self.needs_full_redraw:
+            self.fill_array_state()
+            self.draw_menu()
+        else:
+            if self.menu_dirty:
+                self.draw_menu()
+            for cell in self.dirty_cells:
+                if 0 <= cell[0] < self.GRID_SIZE and 0 <= cell[1] < self.GRID_SIZE:
+                    renderer.set_cell(cell, self.cell_state(cell))
+        self.needs_full_redraw = False
+        self.menu_dirty = False
+        self.dirty_cells.clear()
+        renderer.draw(self.screen)
+        pygame.display.flip()
+
+    def fill_array_state(self):
+        """Rebuild the whole state array, lower layers first"""
+        renderer = self.array_renderer
+        renderer.set_walls(self.grid.cells, WALL)
+        free = [cell for cell in self.visited_cells if not self.grid.is_wall(cell)]
+        renderer.set_cells(free, array_render.VISITED)
+        if self.current_cell and not self.grid.is_wall(self.current_cell):
+            renderer.set_cell(self.current_cell, array_render.CURRENT)
+        renderer.set_cells((cell for cell in self.path if not self.grid.is_wall(cell)), array_render.PATH)
+        for pos, state in ((self.start_pos, array_render.START), (self.end_pos, array_render.END)):
+            if pos and not self.grid.is_wall(pos):
+                renderer.set_cell(pos, state)
+        if self.show_heatmap and self.end_pos:
+            field = self.pathfinder.flow_field(self.end_pos)
+            renderer.set_heat(field.distance, field.max_distance, self.HEAT_NEAR, self.HEAT_FAR)
+        else:
+            renderer.set_heat(None)
+
+    def cell_state(self, pos):
+        """Array renderer state of one cell, same layering as paint_cell"""
+        if self.grid.is_wall(pos):
+            return array_render.WALL
+        if pos == self.start_pos:
+            return array_render.START
+        if pos == self.end_pos:
+            return array_render.END
+        if pos in self.path_numbers():
+            return array_render.PATH
+        if pos == self.current_cell:
+            return array_render.CURRENT
+        if pos in self.visited_cells:
+            return array_render.VISITED
+        return array_render.EMPTY
+
+    def start_animation(self, produce, on_item, on_done=None, speed=DEFAULT_SPEED):
+        """Show the items of produce(emit) over the next frames, calling on_item for each one.
+
+        on_done(completed) runs once the last item was shown, or with False
+        when the animation is cancelled.
+        """
+        self.stop_animation()
+        self.animation = Animation(produce, speed)
+        self.on_animation_item = on_item
+        self.on_animation_done = on_done
+        self.update_caption()
+
+    def stop_animation(self):
+        """Cancel a running animation, waiting for its worker so the grid is safe to edit"""
+        animation, self.animation = self.animation, None
+        if animation is None:
+            return
+        animation.cancel(timeout=None)
+        if self.on_animation_done:
+            self.on_animation_done(False)
+        self.update_caption()
+
+    def advance_animation(self):
+        """Apply the animation items due this frame"""
+        animation = self.animation
+        if animation is None:
+            return
+        for item in animation.take():
+            self.on_animation_item(item)
+        if animation.finished:
+            self.animation = None
+            if self.on_animation_done:
+                self.on_animation_done(True)
+            self.update_caption()
+
+    def handle_animation_key(self, key):
+        """Space pauses, +/- change speed, Enter skips to the result and Esc cancels. Returns True if handled"""
+        animation = self.animation
+        if animation is None:
+            return False
+        if key == pygame.K_SPACE:
+            animation.toggle_pause()
+        elif key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+            animation.skip()
+        elif key == pygame.K_ESCAPE:
+            self.stop_animation()
+        elif key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            animation.faster()
+        elif key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            animation.slower()
+        else:
+            return False
+        self.update_caption()
+        return True
+
+    def update_caption(self):
+        """Show the animation state in the window title"""
+        caption = self.CAPTION
+        if self.animation is not None:
+            state = "paused" if self.animation.paused else f"{self.animation.speed:g} steps/s"
+            caption += f" - {state} (Space pause, +/- speed, Enter skip, Esc cancel)"
+        pygame.display.set_caption(caption)
+
+    def clear_results(self):
+        """Drop the visited cells and path, repainting only if any were shown"""
+        if self.visited_cells or self.path:
+            self.redraw_all()
+        self.path = []
+        self.visited_cells = set()
+
     def handle_grid_click(self, pos):
         """Handle clicks on the grid"""
+        self.stop_animation()
         if pos[1] < self.MENU_HEIGHT:
             return
 
@@ -66,33 +296,34 @@ class GridGUI:
             return
 
         if self.selected_option == 0:  # Start position
-            if cell_pos != self.end_pos and cell_pos not in self.walls:
+            if cell_pos != self.end_pos and not self.grid.is_wall(cell_pos):
+                self.mark_dirty(self.start_pos, cell_pos)
                 self.start_pos = cell_pos
-                self.path = []
-                self.visited_cells = set()
+                self.clear_results()
         elif self.selected_option == 1:  # End position
-            if cell_pos != self.start_pos and cell_pos not in self.walls:
+            if cell_pos != self.start_pos and not self.grid.is_wall(cell_pos):
+                self.mark_dirty(self.end_pos, cell_pos)
                 self.end_pos = cell_pos
-                self.path = []
-                self.visited_cells = set()
+                self.clear_results()
+                if self.show_heatmap:
+                    self.redraw_all()
         elif self.selected_option == 2:  # Wall
             if cell_pos != self.start_pos and cell_pos != self.end_pos:
-                if cell_pos in self.walls:
-                    self.walls.remove(cell_pos)
-                else:
-                    self.walls.add(cell_pos)
-                self.path = []
-                self.visited_cells = set()
+                self.grid.toggle_wall(cell_pos)
+                self.walls_changed([cell_pos])
 
     def clear_all(self):
         """Reset all grid states"""
+        self.stop_animation()
         self.start_pos = None
         self.end_pos = None
-        self.walls.clear()
+        self.grid.clear()
         self.path = []
         self.visited_cells = set()
         self.current_cell = None
-        self.pathfinder = PathFinder(self.GRID_SIZE)
+        self.last_engine = None
+        self.pathfinder.reset()
+        self.redraw_all()
 
     def interpolate_line(self, start, end):
         """Interpolate all points between start and end positions"""
@@ -135,20 +366,43 @@ class GridGUI:
         
         if not (0 <= current_cell[0] < self.GRID_SIZE and 0 <= current_cell[1] < self.GRID_SIZE):
             return
+        self.stop_animation()
             
         if current_cell == self.start_pos or current_cell == self.end_pos:
             return
 
+        changed = []
         if self.last_wall_pos and self.last_wall_pos != current_cell:
             # Interpolate between last position and current position
             wall_points = self.interpolate_line(self.last_wall_pos, current_cell)
             for point in wall_points:
-                if point != self.start_pos and point != self.end_pos:
-                    self.walls.add(point)
-        else:
-            self.walls.add(current_cell)
+                if point != self.start_pos and point != self.end_pos and self.grid.set_wall(point):
+                    changed.append(point)
+        elif self.grid.set_wall(current_cell):
+            changed.append(current_cell)
             
         self.last_wall_pos = current_cell
+        if changed:
+            self.walls_changed(changed)
+
+    def walls_changed(self, cells):
+        """Feed wall edits to the incremental planner and refresh or drop the current path"""
+        self.pathfinder.update_walls(cells)
+        if self.visited_cells:
+            self.redraw_all()
+        self.visited_cells = set()
+        if self.show_heatmap:
+            self.redraw_all()  # Distances to the end changed
+        if self.last_engine == "lpa" and self.start_pos and self.end_pos:
+            # Repair the previous LPA* search instead of discarding it
+            self.pathfinder.start_pos = self.start_pos
+            self.pathfinder.end_pos = self.end_pos
+            self.pathfinder.find_path(engine="lpa")
+            self.mark_dirty(*self.path)
+            self.path = list(reversed(self.pathfinder.path))
+            self.mark_dirty(*self.path)
+        else:
+            self.clear_results()
 
     def run(self):
         running = True
@@ -167,10 +421,17 @@ class GridGUI:
                             self.run_pathfinding(use_astar=True)
                         elif menu_option == 4:  # Dijkstra
                             self.run_pathfinding(use_astar=False)
-                        elif menu_option == 5:  # Clear All
+                        elif menu_option == 5:  # Jump Point Search
+                            self.run_pathfinding(engine="jps")
+                        elif menu_option == 6:  # Incremental LPA*
+                            self.run_pathfinding(engine="lpa")
+                        elif menu_option == 7:  # Hierarchical HPA*
+                            self.run_pathfinding(engine="hpa")
+                        elif menu_option == 8:  # Clear All
                             self.clear_all()
                         else:
                             self.selected_option = menu_option
+                            self.menu_dirty = True
                             self.last_wall_pos = None  # Reset wall tracking
                         continue
 
@@ -179,6 +440,13 @@ class GridGUI:
                     if self.selected_option == 2:  # Wall option
                         self.last_wall_pos = self.get_cell_position(mouse_pos)
                 
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_h:
+                        self.show_heatmap = not self.show_heatmap
+                        self.redraw_all()
+                    else:
+                        self.handle_animation_key(event.key)
+
                 elif event.type == pygame.MOUSEBUTTONUP:
                     self.last_wall_pos = None  # Reset wall tracking
                     
@@ -187,10 +455,11 @@ class GridGUI:
                         self.handle_wall_drawing(pygame.mouse.get_pos())
 
             # Update display
-            self.draw_menu()
-            self.draw_grid()
-            pygame.display.flip()
+            self.advance_animation()
+            self.render()
+            self.clock.tick(TARGET_FPS)
 
+        self.stop_animation()
         pygame.quit()
 
     def draw_menu(self):
@@ -224,73 +493,106 @@ class GridGUI:
         return (grid_x, grid_y)
     
     def draw_grid(self):
-        # Fill background
-        pygame.draw.rect(self.screen, self.WHITE, 
-                        (0, self.MENU_HEIGHT, self.WINDOW_SIZE, self.WINDOW_SIZE))
-        
-        # Draw visited cells
-        for cell in self.visited_cells:
-            self.draw_cell(cell, self.LIGHT_BLUE)
+        """Repaint the whole grid from the static layer plus overlays"""
+        if self.static_layer is None:
+            self.build_static_layer()
+        self.screen.blit(self.static_layer, (0, self.MENU_HEIGHT))
 
-        # Draw current cell being processed
+        overlay = set(self.visited_cells)
+        overlay.update(self.path)
         if self.current_cell:
-            self.draw_cell(self.current_cell, self.DARK_BLUE)
-
-        # Draw final path with numbers
-        for i, cell in enumerate(self.path):
-            self.draw_cell(cell, self.YELLOW)
-            # Draw number on the cell
-            text = self.font.render(str(i + 1), True, self.BLACK)
-            x = cell[0] * self.CELL_SIZE + self.CELL_SIZE // 2
-            y = cell[1] * self.CELL_SIZE + self.MENU_HEIGHT + self.CELL_SIZE // 2
-            text_rect = text.get_rect(center=(x, y))
-            self.screen.blit(text, text_rect)
-        
-        # Draw start, end and walls
+            overlay.add(self.current_cell)
         if self.start_pos:
-            self.draw_cell(self.start_pos, self.GREEN)
+            overlay.add(self.start_pos)
         if self.end_pos:
-            self.draw_cell(self.end_pos, self.RED)
-        for wall in self.walls:
-            self.draw_cell(wall, self.BLACK)
+            overlay.add(self.end_pos)
+        if self.show_heatmap and self.end_pos:
+            distance = self.pathfinder.flow_field(self.end_pos).distance
+            overlay.update(self.grid.cell_pos(cell_id) for cell_id in range(self.grid.size)
+                           if distance[cell_id] != float('inf'))
+        for cell in overlay:
+            self.paint_cell(cell)
 
-        # Draw grid lines
-        for x in range(0, self.WINDOW_SIZE, self.CELL_SIZE):
-            pygame.draw.line(self.screen, self.GRAY, 
-                           (x, self.MENU_HEIGHT), 
-                           (x, self.WINDOW_SIZE + self.MENU_HEIGHT))
-        for y in range(self.MENU_HEIGHT, self.WINDOW_SIZE + self.MENU_HEIGHT, self.CELL_SIZE):
-            pygame.draw.line(self.screen, self.GRAY, 
-                           (0, y), 
-                           (self.WINDOW_SIZE, y))
-
-    def run_pathfinding(self, use_astar=True):
+    def path_numbers(self):
+        """Maps path cells to their 1-based number, rebuilt when the path changes"""
+        key = (id(self.path), len(self.path))
+        if self._path_numbers_key != key:
+            self._path_numbers = {cell: i + 1 for i, cell in enumerate(self.path)}
+            self._path_numbers_key = key
+        return self._path_numbers
+
+    def paint_cell(self, pos):
+        """Repaint one cell from the static layer and its topmost overlay, returns its screen rect"""
+        if self.static_layer is None:
+            self.build_static_layer()
+        rect = self.cell_rect(pos)
+        self.screen.blit(self.static_layer, rect, rect.move(0, -self.MENU_HEIGHT))
+        if self.grid.is_wall(pos):
+            return rect
+
+        # Overlays from top to bottom: endpoints, path, current, visited, heatmap
+        number = self.path_numbers().get(pos)
+        if pos == self.start_pos:
+            self.draw_cell(pos, self.GREEN)
+        elif pos == self.end_pos:
+            self.draw_cell(pos, self.RED)
+        elif number is not None:
+            self.draw_cell(pos, self.YELLOW)
+            text = self.number_glyph(number)
+            previous_clip = self.screen.get_clip()
+            self.screen.set_clip(rect)
+            self.screen.blit(text, text.get_rect(center=rect.center))
+            self.screen.set_clip(previous_clip)
+        elif pos == self.current_cell:
+            self.draw_cell(pos, self.DARK_BLUE)
+        elif pos in self.visited_cells:
+            self.draw_cell(pos, self.LIGHT_BLUE)
+        elif self.show_heatmap and self.end_pos:
+            color = self.heat_color(pos)
+            if color is not None:
+                self.draw_cell(pos, color)
+        return rect
+
+    def heat_color(self, pos):
+        """Heatmap shade of a cell by its distance to the end position, None if unreachable"""
+        field = self.pathfinder.flow_field(self.end_pos)
+        d = field.distance[self.grid.cell_id(pos)]
+        if d == float('inf'):
+            return None
+        t = d / (field.max_distance or 1.0)
+        return tuple(int(near + (far - near) * t) for near, far in zip(self.HEAT_NEAR, self.HEAT_FAR))
+
+    def run_pathfinding(self, use_astar=True, engine=None):
         if not self.start_pos or not self.end_pos:
             return
 
         # Reset previous path and visited cells
-        self.path = []
-        self.visited_cells = set()
+        self.stop_animation()
+        self.last_engine = engine or ("astar" if use_astar else "dijkstra")
+        self.clear_results()
         self.current_cell = None
 
-        # Update pathfinder with current grid state
+        # Update pathfinder with current endpoints, walls are shared through self.grid
         self.pathfinder.start_pos = self.start_pos
         self.pathfinder.end_pos = self.end_pos
-        self.pathfinder.walls = self.walls.copy()
-
-        # Run pathfinding algorithm with animation
-        for step_type, position in self.pathfinder.find_path_animated(use_astar):
-            if step_type == "visit":
-                self.current_cell = position
-                self.visited_cells.add(position)
-            elif step_type == "path":
-                self.path.append(position)
-            
-            # Draw current state
-            self.draw_grid()
-            pygame.display.flip()
-            pygame.event.pump()  # Process events to keep window responsive
-            time.sleep(0.05)  # Add delay for animation
 
+        # The search runs on a worker thread, its step events are shown a frame budget at a time
+        self.start_animation(lambda emit: self.pathfinder.search_steps(use_astar, engine, on_batch=emit),
+                             self.show_step, self.finish_steps)
+
+    def show_step(self, event):
+        """Apply one packed step event from the search"""
+        code, cell_id = decode(event)
+        position = self.grid.cell_pos(cell_id)
+        if code == VISIT:
+            self.mark_dirty(self.current_cell, position)
+            self.current_cell = position
+            self.visited_cells.add(position)
+        elif code == PATH:
+            self.path.append(position)
+            self.mark_dirty(position)
+
+    def finish_steps(self, completed):
         # Clear current cell after finishing
-        self.current_cell = None
\ No newline at end of file
+        self.mark_dirty(self.current_cell)
+        self.current_cell = None
@@ -0,0 +1,163 @@
+from array import array
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+# Occupancy values stored in GridModel.cells
+FREE = 0
+WALL = 1
+
+# Movement costs shared by every engine
+STRAIGHT_COST = 1.0
+DIAGONAL_COST = 1.414
+
+# Listener callbacks receive (cell_id, blocked); cell_id == ALL_CELLS means a bulk change
+ALL_CELLS = -1
+
+class GridModel:
+    """Occupancy grid shared by the GUI, PathFinder and every search engine.
+
+    Cells are addressed by integer ids (y * width + x) and stored in a
+    bytearray, so engines never have to hash coordinate tuples.
+    """
+
+    def __init__(self, width: int, height: Optional[int] = None):
+        self.width = width
+        self.height = width if height is None else height
+        self.size = self.width * self.height
+        self.cells = bytearray(self.size)
+        self.version = 0
+        self._listeners: List[Callable[[int, bool], None]] = []
+        self._neighbor_table = None
+
+    @classmethod
+    def from_walls(cls, grid_size: int, walls: Iterable[Tuple[int, int]]) -> "GridModel":
+        """Build a square grid from a set of wall positions"""
+        grid = cls(grid_size)
+        grid.set_walls(walls)
+        return grid
+
+    @classmethod
+    def from_buffer(cls, width: int, height: int, buffer) -> "GridModel":
+        """Wrap an existing occupancy buffer (e.g. a shared memory view) without copying"""
+        grid = cls(width, height)
+        grid.cells = buffer
+        return grid
+
+    def cell_id(self, pos: Tuple[int, int]) -> int:
+        return pos[1] * self.width + pos[0]
+
+    def cell_pos(self, cell_id: int) -> Tuple[int, int]:
+        y, x = divmod(cell_id, self.width)
+        return (x, y)
+
+    def in_bounds(self, pos: Tuple[int, int]) -> bool:
+        return 0 <= pos[0] < self.width and 0 <= pos[1] < self.height
+
+    def is_wall(self, pos: Tuple[int, int]) -> bool:
+        return self.in_bounds(pos) and self.cells[pos[1] * self.width + pos[0]] == WALL
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return self.is_wall(pos)
+
+    def set_wall(self, pos: Tuple[int, int], blocked: bool = True) -> bool:
+        """Set or clear a wall, returns True if the cell changed"""
+        if not self.in_bounds(pos):
+            return False
+        cell_id = pos[1] * self.width + pos[0]
+        value = WALL if blocked else FREE
+        if self.cells[cell_id] == value:
+            return False
+        self.cells[cell_id] = value
+        self.version += 1
+        for listener in self._listeners:
+            listener(cell_id, blocked)
+        return True
+
+    def toggle_wall(self, pos: Tuple[int, int]) -> bool:
+        """Flip a cell between wall and free, returns the new wall state"""
+        blocked = not self.is_wall(pos)
+        self.set_wall(pos, blocked)
+        return blocked
+
+    def set_walls(self, walls: Iterable[Tuple[int, int]]):
+        """Replace the whole wall layout"""
+        self.cells[:] = bytes(self.size)
+        for x, y in walls:
+            if 0 <= x < self.width and 0 <= y < self.height:
+                self.cells[y * self.width + x] = WALL
+        self._bulk_changed()
+
+    def clear(self):
+        """Remove every wall"""
+        self.cells[:] = bytes(self.size)
+        self._bulk_changed()
+
+    def walls(self) -> Set[Tuple[int, int]]:
+        """Returns wall positions as a set of tuples"""
+        return set(self.iter_walls())
+
+    def iter_walls(self) -> Iterator[Tuple[int, int]]:
+        """Yields wall positions, scanning the buffer with bytearray.find"""
+        cells = self.cells
+        width = self.width
+        cell_id = cells.find(WALL)
+        while cell_id != -1:
+            y, x = divmod(cell_id, width)
+            yield (x, y)
+            cell_id = cells.find(WALL, cell_id + 1)
+
+    def neighbor_table(self):
+        """Returns the cached CSR NeighborTable, building it on first use"""
+        if self._neighbor_table is None:
+            from neighbors import NeighborTable
+            self._neighbor_table = NeighborTable(self)
+        return self._neighbor_table
+
+    def copy(self) -> "GridModel":
+        grid = GridModel(self.width, self.height)
+        grid.cells[:] = self.cells
+        grid.version = self.version
+        return grid
+
+    def add_listener(self, listener: Callable[[int, bool], None]):
+        """Register a callback invoked as listener(cell_id, blocked) on every edit"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[int, bool], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _bulk_changed(self):
+        self.version += 1
+        for listener in self._listeners:
+            listener(ALL_CELLS, False)
+
+
+def as_grid_model(grid_size: int, walls: Union[GridModel, Iterable[Tuple[int, int]]]) -> GridModel:
+    """Accept either a GridModel or a legacy set of wall tuples"""
+    if isinstance(walls, GridModel):
+        return walls
+    grid = GridModel.from_walls(grid_size, walls)
+    # The model only lives for one search, so neighbor rows are built as the search reaches them
+    from neighbors import LazyNeighborTable
+    grid._neighbor_table = LazyNeighborTable(grid)
+    return grid
+
+
+def reconstruct_path(grid: GridModel, came_from: array, start_id: int, end_id: int) -> List[Tuple[int, int]]:
+    """Walk came_from back from end_id, returns [] if end was never reached"""
+    if end_id != start_id and came_from[end_id] == -1:
+        return []
+    path = []
+    current = end_id
+    while current != -1:
+        path.append(grid.cell_pos(current))
+        if current == start_id:
+            break
+        current = came_from[current]
+    path.reverse()
+    return path
+
+def path_cost(path: List[Tuple[int, int]]) -> float:
+    """Movement cost of a cell path, 0 for an empty or single-cell path"""
+    return sum(DIAGONAL_COST if a[0] != b[0] and a[1] != b[1] else STRAIGHT_COST
+               for a, b in zip(path, path[1:]))
@@ -0,0 +1,93 @@
+import math
+from typing import Callable, Dict, Iterable, Tuple
+from grid_model import STRAIGHT_COST, DIAGONAL_COST
+from spatial_index import BucketGrid
+
+# Every heuristic takes the absolute offsets (dx, dy) to the goal
+Heuristic = Callable[[int, int], float]
+
+# Euclidean length scaled so a diagonal step never overestimates DIAGONAL_COST
+EUCLIDEAN_SCALE = min(STRAIGHT_COST, DIAGONAL_COST / math.sqrt(2))
+
+# Priorities are quantized before tie-breaking so float noise does not hide exact ties
+TIE_SCALE = 1_000_000
+
+# Goal sets at least this large are bucketed for the nearest-goal heuristic
+GOAL_INDEX_MIN = 8
+
+def octile(dx: int, dy: int) -> float:
+    """Exact cost on an empty 8-connected grid, admissible and consistent"""
+    if dx > dy:
+        return STRAIGHT_COST * dx + (DIAGONAL_COST - STRAIGHT_COST) * dy
+    return STRAIGHT_COST * dy + (DIAGONAL_COST - STRAIGHT_COST) * dx
+
+def chebyshev(dx: int, dy: int) -> float:
+    return STRAIGHT_COST * max(dx, dy)
+
+def euclidean(dx: int, dy: int) -> float:
+    return EUCLIDEAN_SCALE * math.hypot(dx, dy)
+
+def manhattan(dx: int, dy: int) -> float:
+    """Overestimates diagonal moves, kept for comparison only"""
+    return STRAIGHT_COST * (dx + dy)
+
+HEURISTICS: Dict[str, Heuristic] = {
+    "octile": octile,
+    "chebyshev": chebyshev,
+    "euclidean": euclidean,
+    "manhattan": manhattan,
+}
+
+TIE_BREAKERS = ("none", "larger_g", "cross")
+
+def get_heuristic(name: str, weight: float = 1.0) -> Heuristic:
+    """Look up a heuristic by name, weight > 1 gives weighted A* (not optimal)"""
+    if name not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic '{name}', expected one of {sorted(HEURISTICS)}")
+    heuristic = HEURISTICS[name]
+    if weight == 1.0:
+        return heuristic
+    return lambda dx, dy: weight * heuristic(dx, dy)
+
+def make_priority(heuristic: Heuristic, tie_break: str, start, end) -> Callable[[float, int, int], object]:
+    """Build the frontier priority function priority(g, x, y) for one search.
+
+    - "none": plain f = g + h, equal f values are ordered by cell id
+    - "larger_g": among equal f, expand the cell closest to the goal first
+    - "cross": among equal f, prefer cells near the straight start-goal line
+    """
+    end_x, end_y = end
+    if tie_break == "none":
+        return lambda g, x, y: g + heuristic(abs(end_x - x), abs(end_y - y))
+    if tie_break == "larger_g":
+        return lambda g, x, y: (int((g + heuristic(abs(end_x - x), abs(end_y - y))) * TIE_SCALE + 0.5), -g)
+    if tie_break == "cross":
+        line_x, line_y = start[0] - end_x, start[1] - end_y
+        return lambda g, x, y: (int((g + heuristic(abs(end_x - x), abs(end_y - y))) * TIE_SCALE + 0.5),
+                                abs((x - end_x) * line_y - line_x * (y - end_y)))
+    raise ValueError(f"Unknown tie-breaking rule '{tie_break}', expected one of {TIE_BREAKERS}")
+
+def nearest_goal(heuristic: Heuristic, goals: Iterable[Tuple[int, int]]) -> Callable[[int, int], float]:
+    """Build estimate(x, y), the heuristic to the closest goal.
+
+    A minimum of admissible, consistent heuristics is still both. Larger
+    goal sets go in a bucket grid so only goals near the cell are scored.
+    """
+    goals = list(goals)
+    if len(goals) < GOAL_INDEX_MIN:
+        return lambda x, y: min(heuristic(abs(goal_x - x), abs(goal_y - y)) for goal_x, goal_y in goals)
+    index = BucketGrid()
+    for goal in goals:
+        index.add(goal)
+    return lambda x, y: index.min_estimate((x, y), heuristic)
+
+def make_goal_priority(tie_break: str) -> Callable[[float, float], object]:
+    """Build priority(g, h) for multi-goal searches.
+
+    "cross" needs a single goal, so it falls back to "larger_g".
+    """
+    if tie_break == "none":
+        return lambda g, h: g + h
+    if tie_break in TIE_BREAKERS:
+        return lambda g, h: (int((g + h) * TIE_SCALE + 0.5), -g)
+    raise ValueError(f"Unknown tie-breaking rule '{tie_break}', expected one of {TIE_BREAKERS}")
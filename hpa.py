@@ -0,0 +1,409 @@
+import heapq
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+from grid_model import GridModel, WALL, ALL_CELLS, STRAIGHT_COST, DIAGONAL_COST, as_grid_model
+from frontier import make_frontier
+from heuristics import octile
+from stats import SearchStats
+from steps import StepRecorder, VISIT, PUSH
+
+INF = float('inf')
+
+# Straight entrances at least this long get a transition at each end instead of one in the middle
+LONG_ENTRANCE = 6
+
+# A transition is a pair of free cells on either side of a cluster border and the cost of the move
+Transition = Tuple[int, int, float]
+
+
+class Cluster:
+    """One block of the grid with its abstract nodes and their outgoing edges"""
+    __slots__ = ("index", "x0", "y0", "x1", "y1", "nodes", "edges")
+
+    def __init__(self, index: int, x0: int, y0: int, x1: int, y1: int):
+        self.index = index
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1  # Inclusive bounds
+        self.nodes: Set[int] = set()
+        self.edges: Dict[int, List[Tuple[int, float]]] = {}  # node -> (node, cost), intra and inter
+
+
+class ClusterGraph:
+    """HPA* abstraction of a grid split into cluster_size x cluster_size blocks.
+
+    Abstract nodes are border cells where a move into a neighboring cluster
+    is possible (transitions), including diagonal squeezes and moves across
+    cluster corners. Each cluster links its nodes with their shortest
+    in-cluster distances. Borders and clusters are built on first use and a
+    wall edit only drops the ones within one cell of it.
+    """
+
+    def __init__(self, grid: GridModel, cluster_size: int = 16, frontier: str = "lazy"):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.frontier = frontier
+        self.cols = -(-grid.width // cluster_size)
+        self.rows = -(-grid.height // cluster_size)
+        self._clusters: Dict[int, Cluster] = {}
+        self._borders: Dict[Tuple[int, int], List[Transition]] = {}
+        self.rebuilt = 0  # Clusters (re)built so far
+        self.table = grid.neighbor_table()  # Shared free-neighbor rows with move costs
+        grid.add_listener(self._on_wall_changed)
+
+    def detach(self):
+        self.grid.remove_listener(self._on_wall_changed)
+
+    def cluster_index(self, cell_id: int) -> int:
+        y, x = divmod(cell_id, self.grid.width)
+        return (y // self.cluster_size) * self.cols + x // self.cluster_size
+
+    def _on_wall_changed(self, cell_id: int, blocked: bool):
+        if cell_id == ALL_CELLS:
+            self._clusters.clear()
+            self._borders.clear()
+            return
+        # Borders only depend on the cells right next to them, so a change
+        # reaches the clusters within one cell and the borders they share
+        grid = self.grid
+        y, x = divmod(cell_id, grid.width)
+        own = self.cluster_index(cell_id)
+        self._clusters.pop(own, None)
+        for new_y in range(max(y - 1, 0), min(y + 2, grid.height)):
+            for new_x in range(max(x - 1, 0), min(x + 2, grid.width)):
+                other = self.cluster_index(new_y * grid.width + new_x)
+                if other != own:
+                    self._clusters.pop(other, None)
+                    self._borders.pop((min(own, other), max(own, other)), None)
+
+    def cluster(self, index: int) -> Cluster:
+        """Returns the cluster with its abstract graph, rebuilding it if an edit dropped it"""
+        cluster = self._clusters.get(index)
+        if cluster is None:
+            cluster = self._build_cluster(index)
+            self._clusters[index] = cluster
+        return cluster
+
+    def _bounds(self, index: int) -> Tuple[int, int, int, int]:
+        size = self.cluster_size
+        row, col = divmod(index, self.cols)
+        x0, y0 = col * size, row * size
+        return x0, y0, min(x0 + size, self.grid.width) - 1, min(y0 + size, self.grid.height) - 1
+
+    def _build_cluster(self, index: int) -> Cluster:
+        cluster = Cluster(index, *self._bounds(index))
+        row, col = divmod(index, self.cols)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                other_row, other_col = row + dy, col + dx
+                if (dx or dy) and 0 <= other_row < self.rows and 0 <= other_col < self.cols:
+                    other = other_row * self.cols + other_col
+                    for a, b, cost in self._border(min(index, other), max(index, other)):
+                        if self.cluster_index(a) != index:
+                            a, b = b, a
+                        cluster.nodes.add(a)
+                        cluster.edges.setdefault(a, []).append((b, cost))
+
+        # Intra-cluster edges, one local Dijkstra per node
+        nodes = cluster.nodes
+        for node in nodes:
+            costs, _ = self.local_search(cluster, node, nodes)
+            links = cluster.edges[node]
+            for other, cost in costs.items():
+                if other != node:
+                    links.append((other, cost))
+        self.rebuilt += 1
+        return cluster
+
+    def _border(self, first: int, second: int) -> List[Transition]:
+        key = (first, second)
+        transitions = self._borders.get(key)
+        if transitions is None:
+            transitions = self._build_border(first, second)
+            self._borders[key] = transitions
+        return transitions
+
+    def _build_border(self, first: int, second: int) -> List[Transition]:
+        ax0, ay0, ax1, ay1 = self._bounds(first)
+        bx0, by0, bx1, by1 = self._bounds(second)
+        width = self.grid.width
+        if ay0 == by0:  # Side by side, first on the left
+            a_cells = [y * width + ax1 for y in range(ay0, ay1 + 1)]
+            b_cells = [y * width + bx0 for y in range(by0, by1 + 1)]
+            return self._edge_transitions(a_cells, b_cells)
+        if ax0 == bx0:  # Stacked, first on top
+            a_cells = [ay1 * width + x for x in range(ax0, ax1 + 1)]
+            b_cells = [by0 * width + x for x in range(bx0, bx1 + 1)]
+            return self._edge_transitions(a_cells, b_cells)
+        # Diagonal neighbors only meet at a corner
+        if bx0 > ax0:
+            a, b = ay1 * width + ax1, by0 * width + bx0
+        else:
+            a, b = ay1 * width + ax0, by0 * width + bx1
+        cells = self.grid.cells
+        return [(a, b, DIAGONAL_COST)] if cells[a] != WALL and cells[b] != WALL else []
+
+    def _edge_transitions(self, a_cells: List[int], b_cells: List[int]) -> List[Transition]:
+        """Transitions across a straight border, a_cells[i] faces b_cells[i]"""
+        cells = self.grid.cells
+        a_free = [cells[cell] != WALL for cell in a_cells]
+        b_free = [cells[cell] != WALL for cell in b_cells]
+        length = len(a_cells)
+        transitions = []
+
+        # Free cells along each side form segments that are connected inside their cluster, so
+        # one crossing per (segment, segment) pair keeps every crossing reachable
+        a_segment = self._segments(a_free)
+        b_segment = self._segments(b_free)
+        groups: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for i in range(length):
+            if not a_free[i]:
+                continue
+            for j in (i, i - 1, i + 1):
+                if 0 <= j < length and b_free[j]:
+                    groups.setdefault((a_segment[i], b_segment[j]), []).append((i, j))
+
+        for crossings in groups.values():
+            # Prefer straight crossings, taking both ends of long entrances and the middle otherwise
+            straight = [crossing for crossing in crossings if crossing[0] == crossing[1]]
+            candidates = straight or crossings
+            if len(straight) >= LONG_ENTRANCE:
+                picks = (candidates[0], candidates[-1])
+            else:
+                picks = (candidates[len(candidates) // 2],)
+            for i, j in picks:
+                transitions.append((a_cells[i], b_cells[j], STRAIGHT_COST if i == j else DIAGONAL_COST))
+        return transitions
+
+    def free_neighbors(self, cell_id: int) -> Iterator[Tuple[int, float]]:
+        """(neighbor id, move cost) for every free neighbor, read from the neighbor table"""
+        table = self.table
+        targets, costs = table.targets, table.costs
+        for k in range(table.offsets[cell_id], table.ends[cell_id]):
+            yield targets[k], costs[k]
+
+    @staticmethod
+    def _segments(free: List[bool]) -> List[int]:
+        """Labels maximal runs of free cells along a border side, -1 on walls"""
+        segments = []
+        label = -1
+        for i, is_free in enumerate(free):
+            if not is_free:
+                segments.append(-1)
+                continue
+            if i == 0 or not free[i - 1]:
+                label = i
+            segments.append(label)
+        return segments
+
+    def local_search(self, cluster: Cluster, source: int, targets: Set[int],
+                     stop_at: int = -1) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """Dijkstra from source restricted to the cluster.
+
+        Returns (cost of each reached target, came_from of every reached cell),
+        stopping early once stop_at is closed or every target is reached.
+        """
+        width = self.grid.width
+        table = self.table
+        offsets, ends = table.offsets, table.ends
+        next_ids, costs = table.targets, table.costs
+        x0, y0, x1, y1 = cluster.x0, cluster.y0, cluster.x1, cluster.y1
+        local_width = x1 - x0 + 1
+
+        def local(cell_id):
+            y, x = divmod(cell_id, width)
+            return (y - y0) * local_width + x - x0
+
+        frontier = make_frontier(self.frontier, local_width * (y1 - y0 + 1))
+        closed = frontier.closed
+        cost_so_far = {source: 0.0}
+        came_from = {source: -1}
+        found: Dict[int, float] = {}
+        remaining = len(targets)
+        frontier.push(local(source), 0.0)
+        while remaining:
+            current_local = frontier.pop()
+            if current_local == -1:
+                break
+            local_y, local_x = divmod(current_local, local_width)
+            x, y = local_x + x0, local_y + y0
+            current = y * width + x
+            current_cost = cost_so_far[current]
+            if current in targets:
+                found[current] = current_cost
+                remaining -= 1
+            if current == stop_at:
+                break
+            for k in range(offsets[current], ends[current]):
+                next_id = next_ids[k]
+                new_y, new_x = divmod(next_id, width)
+                if not (x0 <= new_x <= x1 and y0 <= new_y <= y1):
+                    continue
+                next_local = (new_y - y0) * local_width + new_x - x0
+                if closed[next_local]:
+                    continue
+                new_cost = current_cost + costs[k]
+                if new_cost < cost_so_far.get(next_id, INF):
+                    cost_so_far[next_id] = new_cost
+                    came_from[next_id] = current
+                    frontier.push(next_local, new_cost)
+        return found, came_from
+
+
+class HierarchicalAStar:
+    """HPA* engine: abstract search over cluster transitions, refined hop by hop.
+
+    The start and end are linked into the abstract graph with one local
+    search each, the abstract path is found with A*, and each hop inside a
+    cluster is refined with a local search only when the path is walked.
+    Paths are not guaranteed optimal, hops only follow the chosen transitions.
+    """
+
+    def __init__(self, grid_size: int, frontier: str = "lazy", cluster_size: int = 16):
+        self.grid_size = grid_size
+        self.frontier = frontier
+        self.cluster_size = cluster_size
+        self.counters = {}  # Abstract search counters of the last query
+        self._graph: Optional[ClusterGraph] = None
+
+    def graph(self, grid: GridModel) -> ClusterGraph:
+        """Returns the cluster graph for grid, kept in sync with its edits"""
+        if self._graph is None or self._graph.grid is not grid:
+            if self._graph is not None:
+                self._graph.detach()
+            self._graph = ClusterGraph(grid, self.cluster_size, self.frontier)
+        return self._graph
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  walls: Union[GridModel, Set[Tuple[int, int]]],
+                  stats: Optional[SearchStats] = None,
+                  steps: Optional[StepRecorder] = None) -> List[Tuple[int, int]]:
+        """Find path with an abstract search followed by full refinement.
+
+        stats and the VISIT/PUSH steps describe the abstract search, the
+        elapsed time includes refinement.
+        """
+        if stats is not None:
+            stats.start()
+        grid = as_grid_model(self.grid_size, walls)
+        path = list(self.iter_path(start, end, grid, stats, steps))
+        if steps is not None:
+            steps.emit_path(grid, path)
+        if stats is not None:
+            stats.stop()
+        return path
+
+    def iter_path(self, start: Tuple[int, int], end: Tuple[int, int], grid: GridModel,
+                  stats: Optional[SearchStats] = None,
+                  steps: Optional[StepRecorder] = None) -> Iterator[Tuple[int, int]]:
+        """Yields the path cell by cell, refining each abstract hop only when it is reached"""
+        graph = self.graph(grid)
+        abstract = self.abstract_path(graph, grid.cell_id(start), grid.cell_id(end), stats, steps)
+        if not abstract:
+            return
+        yield start
+        for current, following in zip(abstract, abstract[1:]):
+            yield from self._refine(graph, current, following)
+
+    def abstract_path(self, graph: ClusterGraph, start_id: int, end_id: int,
+                      stats: Optional[SearchStats] = None,
+                      steps: Optional[StepRecorder] = None) -> List[int]:
+        """Cell ids of the abstract nodes from start to end, [] if unreachable"""
+        grid = graph.grid
+        built = graph.rebuilt
+        if start_id == end_id:
+            self.counters = {}
+            return [start_id]
+        if grid.cells[end_id] == WALL:
+            self.counters = {}
+            return []
+        end_cluster = graph.cluster(graph.cluster_index(end_id))
+
+        # Temporary edges linking start and end into the abstract graph. Engines
+        # may leave a wall start cell, so then its free neighbors are the entries
+        if grid.cells[start_id] == WALL:
+            start_links = list(graph.free_neighbors(start_id))
+        else:
+            start_links = [(start_id, 0.0)]
+        entry_links = {}
+        for entry, _ in start_links:
+            entry_cluster = graph.cluster(graph.cluster_index(entry))
+            targets = set(entry_cluster.nodes)
+            if entry_cluster is end_cluster:
+                targets.add(end_id)
+            entry_links[entry], _ = graph.local_search(entry_cluster, entry, targets)
+        end_links, _ = graph.local_search(end_cluster, end_id, end_cluster.nodes)
+
+        width = grid.width
+        end_y, end_x = divmod(end_id, width)
+        cost_so_far = {start_id: 0.0}
+        came_from = {start_id: -1}
+        closed = set()
+        heap = [(0.0, start_id)]
+        pushes = pops = stale_pops = 0
+        peak_frontier = 1
+        heuristic = octile if stats is None else stats.count_calls(octile)
+        while heap:
+            current = heapq.heappop(heap)[1]
+            pops += 1
+            if current in closed:
+                stale_pops += 1
+                continue
+            closed.add(current)
+            if steps is not None:
+                steps.emit(VISIT, current)
+            if current == end_id:
+                break
+            current_cost = cost_so_far[current]
+            cluster = graph.cluster(graph.cluster_index(current))
+            links = cluster.edges.get(current, ())
+            if current == start_id and start_id not in entry_links:
+                links = start_links
+            if current in entry_links:
+                links = list(entry_links[current].items()) + list(links)
+            if cluster is end_cluster and current in end_links:
+                links = list(links) + [(end_id, end_links[current])]
+            for next_id, cost in links:
+                if next_id in closed:
+                    continue
+                new_cost = current_cost + cost
+                if new_cost < cost_so_far.get(next_id, INF):
+                    cost_so_far[next_id] = new_cost
+                    came_from[next_id] = current
+                    next_y, next_x = divmod(next_id, width)
+                    heapq.heappush(heap, (new_cost + heuristic(abs(end_x - next_x), abs(end_y - next_y)), next_id))
+                    pushes += 1
+                    if steps is not None:
+                        steps.emit(PUSH, next_id)
+                    if stats is not None and len(heap) > peak_frontier:
+                        peak_frontier = len(heap)
+        self.counters = {"pushes": pushes, "pops": pops, "stale_pops": stale_pops, "decrease_keys": 0,
+                         "clusters_built": graph.rebuilt - built}
+        if stats is not None:
+            stats.pushes, stats.pops, stats.stale_pops = pushes, pops, stale_pops
+            stats.expanded = pops - stale_pops
+            stats.peak_frontier = peak_frontier
+            stats.peak_state = len(cost_so_far)
+
+        if end_id not in came_from:
+            return []
+        path = []
+        current = end_id
+        while current != -1:
+            path.append(current)
+            current = came_from[current]
+        path.reverse()
+        return path
+
+    def _refine(self, graph: ClusterGraph, source: int, target: int) -> Iterator[Tuple[int, int]]:
+        """Cells after source up to target for one abstract hop"""
+        grid = graph.grid
+        cluster = graph.cluster(graph.cluster_index(source))
+        if graph.cluster_index(target) != cluster.index:
+            # Inter-cluster edges are single moves
+            yield grid.cell_pos(target)
+            return
+        _, came_from = graph.local_search(cluster, source, {target}, stop_at=target)
+        hop = []
+        current = target
+        while current != source:
+            hop.append(grid.cell_pos(current))
+            current = came_from[current]
+        yield from reversed(hop)
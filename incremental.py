@@ -0,0 +1,157 @@
+from array import array
+from typing import Iterable, List, Optional, Set, Tuple, Union
+from grid_model import GridModel, WALL, STRAIGHT_COST, DIAGONAL_COST, as_grid_model
+from frontier import IndexedHeap, track, untrack
+from heuristics import octile, TIE_SCALE
+from stats import SearchStats
+from steps import StepRecorder, observe, unobserve
+
+INF = float('inf')
+NO_KEY = (INF, INF)
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1))
+
+class LPAStar:
+    """Lifelong Planning A*, keeps its search state between calls.
+
+    g/rhs values survive across find_path calls for the same grid and
+    endpoints. After walls change (reported through update_walls), only the
+    edited cells are re-queued and the search repairs the affected part of
+    the tree instead of starting over.
+    """
+
+    def __init__(self, grid_size: int, frontier: str = "indexed"):
+        # LPA* needs decrease-key and removal, so it always runs on an IndexedHeap
+        self.grid_size = grid_size
+        self.counters = {}  # Frontier counters of the last repair
+        self.grid: Optional[GridModel] = None
+        self.start = None
+        self.end = None
+        self.version = -1
+        self._heuristic = octile  # Swapped for a counting wrapper while stats are collected
+
+    def reset(self, grid: GridModel, start: Tuple[int, int], end: Tuple[int, int]):
+        """Drop all search state and plan from scratch on the next call"""
+        self.grid = grid
+        self.start = start
+        self.end = end
+        self.version = grid.version
+        self.start_id = grid.cell_id(start)
+        self.end_id = grid.cell_id(end)
+        self.g = array('d', [INF]) * grid.size
+        self.rhs = array('d', [INF]) * grid.size
+        self.queue = IndexedHeap(grid.size)
+        self.rhs[self.start_id] = 0.0
+        self.queue.push(self.start_id, self._key(self.start_id))
+
+    def update_walls(self, cells: Iterable[Tuple[int, int]]):
+        """Feed edited wall cells, only their incoming edges changed"""
+        if self.grid is None:
+            return
+        for pos in cells:
+            if self.grid.in_bounds(pos):
+                self._update_vertex(self.grid.cell_id(pos))
+        self.version = self.grid.version
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  walls: Union[GridModel, Set[Tuple[int, int]]],
+                  stats: Optional[SearchStats] = None,
+                  steps: Optional[StepRecorder] = None) -> List[Tuple[int, int]]:
+        """Find path, reusing the previous search if only reported walls changed"""
+        if stats is not None:
+            stats.start()
+        grid = as_grid_model(self.grid_size, walls)
+        if grid is not self.grid or start != self.start or end != self.end or grid.version != self.version:
+            self.reset(grid, start, end)
+        before = self.queue.counters()
+        if stats is None and steps is None:
+            self._compute_shortest_path()
+        else:
+            # The queue outlives this call, so instrumentation is removed again afterwards
+            if stats is not None:
+                track(self.queue)
+                self._heuristic = stats.count_calls(octile)
+            if steps is not None:
+                observe(self.queue, steps)
+            self._compute_shortest_path()
+            self._heuristic = octile
+            unobserve(self.queue)
+            untrack(self.queue)
+        after = self.queue.counters()
+        self.counters = {name: after[name] - before[name] for name in after}
+        path = self._extract_path()
+        if steps is not None:
+            steps.emit_path(grid, path)
+        if stats is not None:
+            # Counters are this call's deltas, the queue lives across calls
+            for name, value in self.counters.items():
+                setattr(stats, name, value)
+            stats.expanded = self.counters["pops"] - self.counters["stale_pops"]
+            stats.peak_frontier = self.queue.peak_size
+            stats.peak_state = self.queue.labelled
+            stats.stop()
+        return path
+
+    def _key(self, cell_id: int) -> Tuple[int, int]:
+        best = min(self.g[cell_id], self.rhs[cell_id])
+        if best == INF:
+            return NO_KEY
+        y, x = divmod(cell_id, self.grid.width)
+        end_x, end_y = self.end
+        # Quantized so float noise cannot break the [f, g] tie that ends the search
+        f = best + self._heuristic(abs(end_x - x), abs(end_y - y))
+        return (int(f * TIE_SCALE + 0.5), int(best * TIE_SCALE + 0.5))
+
+    def _neighbors(self, cell_id: int):
+        """Yields (neighbor id, move cost) for every in-bounds neighbor, walls included"""
+        width, height = self.grid.width, self.grid.height
+        y, x = divmod(cell_id, width)
+        for dx, dy in DIRECTIONS:
+            new_x, new_y = x + dx, y + dy
+            if 0 <= new_x < width and 0 <= new_y < height:
+                yield new_y * width + new_x, (DIAGONAL_COST if dx and dy else STRAIGHT_COST)
+
+    def _update_vertex(self, cell_id: int):
+        if cell_id != self.start_id:
+            if self.grid.cells[cell_id] == WALL:
+                # Moving into a wall is impossible, so no predecessor can reach it
+                self.rhs[cell_id] = INF
+            else:
+                g = self.g
+                self.rhs[cell_id] = min((g[pred] + cost for pred, cost in self._neighbors(cell_id)), default=INF)
+        self.queue.remove(cell_id)
+        if self.g[cell_id] != self.rhs[cell_id]:
+            self.queue.push(cell_id, self._key(cell_id))
+
+    def _compute_shortest_path(self):
+        queue, g, rhs = self.queue, self.g, self.rhs
+        end_id = self.end_id
+        while True:
+            top = queue.peek_key()
+            if top is None:
+                break
+            if not (top < self._key(end_id) or rhs[end_id] != g[end_id]):
+                break
+            current = queue.pop()
+            if g[current] > rhs[current]:
+                g[current] = rhs[current]
+            else:
+                g[current] = INF
+                self._update_vertex(current)
+            for next_id, _ in self._neighbors(current):
+                self._update_vertex(next_id)
+
+    def _extract_path(self) -> List[Tuple[int, int]]:
+        """Walk back from the end through the consistent predecessor minimizing g + cost"""
+        g, rhs = self.g, self.rhs
+        if g[self.end_id] == INF:
+            return []
+        grid = self.grid
+        path = [self.end]
+        current = self.end_id
+        while current != self.start_id:
+            # Cells still queued behind the goal may hold stale g values, so require g == rhs
+            current = min(self._neighbors(current),
+                          key=lambda pair: g[pair[0]] + pair[1] if g[pair[0]] == rhs[pair[0]] else INF)[0]
+            path.append(grid.cell_pos(current))
+        path.reverse()
+        return path
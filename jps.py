@@ -0,0 +1,285 @@
+from array import array
+from typing import Dict, List, Optional, Set, Tuple, Union
+from grid_model import GridModel, WALL, ALL_CELLS, STRAIGHT_COST, DIAGONAL_COST, as_grid_model
+from frontier import make_frontier, track
+from heuristics import octile
+from stats import SearchStats
+from steps import StepRecorder, observe
+
+INF = float('inf')
+
+# Straight directions covered by the jump table, in table order
+EAST, WEST, SOUTH, NORTH = range(4)
+STRAIGHT_DIRECTIONS = {(1, 0): EAST, (-1, 0): WEST, (0, 1): SOUTH, (0, -1): NORTH}
+ALL_DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1))
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+class JumpTable:
+    """Precomputed straight jump distances (the JPS+ table).
+
+    For every cell and straight direction, dist[d][cell] is k > 0 when a jump
+    point lies k steps away, or -k when the ray runs k free steps into a wall
+    or the grid edge without meeting one. Wall edits mark the three rows and
+    columns around the edited cell dirty; they are rebuilt on next use.
+    """
+
+    def __init__(self, grid: GridModel):
+        self.grid = grid
+        self.dist = [array('i', [0]) * grid.size for _ in range(4)]
+        self._dirty_rows: Set[int] = set(range(grid.height))
+        self._dirty_cols: Set[int] = set(range(grid.width))
+        grid.add_listener(self._on_wall_changed)
+
+    def detach(self):
+        self.grid.remove_listener(self._on_wall_changed)
+
+    def _on_wall_changed(self, cell_id: int, blocked: bool):
+        grid = self.grid
+        if cell_id == ALL_CELLS:
+            self._dirty_rows.update(range(grid.height))
+            self._dirty_cols.update(range(grid.width))
+            return
+        y, x = divmod(cell_id, grid.width)
+        self._dirty_rows.update(r for r in (y - 1, y, y + 1) if 0 <= r < grid.height)
+        self._dirty_cols.update(c for c in (x - 1, x, x + 1) if 0 <= c < grid.width)
+
+    def refresh(self):
+        """Rebuild rows and columns invalidated since the last query"""
+        for y in self._dirty_rows:
+            self._build_row(y)
+        for x in self._dirty_cols:
+            self._build_col(x)
+        self._dirty_rows.clear()
+        self._dirty_cols.clear()
+
+    def _free(self, x: int, y: int) -> bool:
+        grid = self.grid
+        return 0 <= x < grid.width and 0 <= y < grid.height and grid.cells[y * grid.width + x] != WALL
+
+    def _build_row(self, y: int):
+        free = self._free
+        width = self.grid.width
+        base = y * width
+        for direction, dx, xs in ((EAST, 1, range(width - 1, -1, -1)), (WEST, -1, range(width))):
+            dist = self.dist[direction]
+            for x in xs:
+                nx = x + dx
+                if not free(nx, y):
+                    dist[base + x] = 0
+                elif ((not free(nx, y + 1) and free(nx + dx, y + 1)) or
+                      (not free(nx, y - 1) and free(nx + dx, y - 1))):
+                    dist[base + x] = 1
+                else:
+                    ahead = dist[base + nx]
+                    dist[base + x] = ahead + 1 if ahead > 0 else ahead - 1
+
+    def _build_col(self, x: int):
+        free = self._free
+        width, height = self.grid.width, self.grid.height
+        for direction, dy, ys in ((SOUTH, 1, range(height - 1, -1, -1)), (NORTH, -1, range(height))):
+            dist = self.dist[direction]
+            for y in ys:
+                ny = y + dy
+                if not free(x, ny):
+                    dist[y * width + x] = 0
+                elif ((not free(x + 1, ny) and free(x + 1, ny + dy)) or
+                      (not free(x - 1, ny) and free(x - 1, ny + dy))):
+                    dist[y * width + x] = 1
+                else:
+                    ahead = dist[ny * width + x]
+                    dist[y * width + x] = ahead + 1 if ahead > 0 else ahead - 1
+
+
+class JumpPointSearch:
+    """Jump Point Search for uniform-cost 8-connected grids.
+
+    Only jump points enter the frontier; straight and diagonal runs between
+    them are scanned. Diagonal moves may cut wall corners, matching the
+    neighbor rules of AStar and Dijkstra, so path costs are identical.
+    """
+
+    def __init__(self, grid_size: int, frontier: str = "lazy", use_jump_table: bool = False):
+        self.grid_size = grid_size
+        self.frontier = frontier
+        self.use_jump_table = use_jump_table
+        self.counters = {}  # Frontier counters of the last search
+        self._table: Optional[JumpTable] = None
+
+    def heuristic(self, a: Tuple[int, int], b: Tuple[int, int]) -> float:
+        """Calculate octile distance between two points"""
+        return octile(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+    def jump_table(self, grid: GridModel) -> JumpTable:
+        """Returns an up-to-date jump table for grid, reusing it across searches"""
+        if self._table is None or self._table.grid is not grid:
+            if self._table is not None:
+                self._table.detach()
+            self._table = JumpTable(grid)
+        self._table.refresh()
+        return self._table
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  walls: Union[GridModel, Set[Tuple[int, int]]],
+                  stats: Optional[SearchStats] = None,
+                  steps: Optional[StepRecorder] = None) -> List[Tuple[int, int]]:
+        """Find path using Jump Point Search"""
+        grid = as_grid_model(self.grid_size, walls)
+        came_from = self.search(grid, start, end, stats, steps)
+        path = self.expand_path(grid, came_from, start, end)
+        if steps is not None:
+            steps.emit_path(grid, path)
+        return path
+
+    def search(self, grid: GridModel, start: Tuple[int, int], end: Tuple[int, int],
+               stats: Optional[SearchStats] = None, steps: Optional[StepRecorder] = None) -> Dict[int, int]:
+        """Run JPS and return the jump point parent map (cell id -> parent id).
+
+        Only jump points enter the frontier, so steps sees jump point events.
+        """
+        if stats is not None:
+            stats.start()
+        width, height = grid.width, grid.height
+        cells = grid.cells
+        end_x, end_y = end
+        start_id = grid.cell_id(start)
+        end_id = grid.cell_id(end)
+        table = self.jump_table(grid) if self.use_jump_table else None
+
+        def free(x, y):
+            return 0 <= x < width and 0 <= y < height and cells[y * width + x] != WALL
+
+        def jump_straight(x, y, dx, dy):
+            if table is not None:
+                # Table lookup, then check whether the goal sits on the ray first
+                run = table.dist[STRAIGHT_DIRECTIONS[(dx, dy)]][y * width + x]
+                reach = run if run > 0 else -run
+                if dx and end_y == y and 0 < (end_x - x) * dx <= reach:
+                    return end_x, end_y
+                if dy and end_x == x and 0 < (end_y - y) * dy <= reach:
+                    return end_x, end_y
+                if run > 0:
+                    return x + dx * run, y + dy * run
+                return None
+            while True:
+                x += dx
+                y += dy
+                if not free(x, y):
+                    return None
+                if x == end_x and y == end_y:
+                    return x, y
+                if dx:
+                    if ((not free(x, y + 1) and free(x + dx, y + 1)) or
+                        (not free(x, y - 1) and free(x + dx, y - 1))):
+                        return x, y
+                elif ((not free(x + 1, y) and free(x + 1, y + dy)) or
+                      (not free(x - 1, y) and free(x - 1, y + dy))):
+                    return x, y
+
+        def jump_diagonal(x, y, dx, dy):
+            while True:
+                x += dx
+                y += dy
+                if not free(x, y):
+                    return None
+                if x == end_x and y == end_y:
+                    return x, y
+                if ((not free(x - dx, y) and free(x - dx, y + dy)) or
+                    (not free(x, y - dy) and free(x + dx, y - dy))):
+                    return x, y
+                if jump_straight(x, y, dx, 0) is not None or jump_straight(x, y, 0, dy) is not None:
+                    return x, y
+
+        def directions(x, y, parent):
+            """Pruned successor directions given the direction we arrived from"""
+            if parent == -1:
+                return ALL_DIRECTIONS
+            parent_y, parent_x = divmod(parent, width)
+            dx, dy = _sign(x - parent_x), _sign(y - parent_y)
+            if dx and dy:
+                dirs = [(dx, 0), (0, dy), (dx, dy)]
+                if not free(x - dx, y):
+                    dirs.append((-dx, dy))
+                if not free(x, y - dy):
+                    dirs.append((dx, -dy))
+            elif dx:
+                dirs = [(dx, 0)]
+                if not free(x, y + 1):
+                    dirs.append((dx, 1))
+                if not free(x, y - 1):
+                    dirs.append((dx, -1))
+            else:
+                dirs = [(0, dy)]
+                if not free(x + 1, y):
+                    dirs.append((1, dy))
+                if not free(x - 1, y):
+                    dirs.append((-1, dy))
+            return dirs
+
+        heuristic = self.heuristic if stats is None else stats.count_calls(self.heuristic)
+        frontier = make_frontier(self.frontier, grid.size)
+        if stats is not None:
+            track(frontier)
+        if steps is not None:
+            observe(frontier, steps)
+        closed = frontier.closed
+        came_from = {start_id: -1}
+        cost_so_far = {start_id: 0.0}
+        frontier.push(start_id, heuristic(start, end))
+
+        while True:
+            current = frontier.pop()
+            if current == -1:
+                break
+            if current == end_id:
+                break
+
+            y, x = divmod(current, width)
+            current_cost = cost_so_far[current]
+            for dx, dy in directions(x, y, came_from[current]):
+                if dx and dy:
+                    point = jump_diagonal(x, y, dx, dy)
+                else:
+                    point = jump_straight(x, y, dx, dy)
+                if point is None:
+                    continue
+                next_id = point[1] * width + point[0]
+                if closed[next_id]:
+                    continue
+                run = max(abs(point[0] - x), abs(point[1] - y))
+                new_cost = current_cost + run * (DIAGONAL_COST if dx and dy else STRAIGHT_COST)
+                if new_cost < cost_so_far.get(next_id, INF):
+                    cost_so_far[next_id] = new_cost
+                    came_from[next_id] = current
+                    frontier.push(next_id, new_cost + heuristic(point, end))
+
+        self.counters = frontier.counters()
+        if stats is not None:
+            stats.add_frontier(frontier)
+            stats.peak_state = len(cost_so_far)
+            stats.stop()
+        return came_from
+
+    def expand_path(self, grid: GridModel, came_from: Dict[int, int],
+                    start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Turn the jump point chain into a cell-by-cell path"""
+        end_id = grid.cell_id(end)
+        if end_id not in came_from:
+            return []
+        jump_points = []
+        current = end_id
+        while current != -1:
+            jump_points.append(grid.cell_pos(current))
+            current = came_from[current]
+        jump_points.reverse()
+
+        path = [jump_points[0]]
+        for (x, y), (next_x, next_y) in zip(jump_points, jump_points[1:]):
+            dx, dy = _sign(next_x - x), _sign(next_y - y)
+            while (x, y) != (next_x, next_y):
+                x += dx
+                y += dy
+                path.append((x, y))
+        return path
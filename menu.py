@@ -4,6 +4,10 @@ from PyQt5.QtCore import Qt
 from grid import GridGUI
 from stops_mode import StopsMode
 
+# Grid size limits accepted by the menu, large grids are meant for the HPA* engine
+MIN_GRID_SIZE = 8
+MAX_GRID_SIZE = 256
+
 class MenuWindow(QMainWindow):
     def __init__(self, app):
         super().__init__()
@@ -17,7 +21,7 @@ class MenuWindow(QMainWindow):
         layout = QVBoxLayout(central_widget)
         
         # Add title label
-        title = QLabel("Enter Grid Size (8-32):")
+        title = QLabel(f"Enter Grid Size ({MIN_GRID_SIZE}-{MAX_GRID_SIZE}):")
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
         
@@ -51,7 +55,7 @@ class MenuWindow(QMainWindow):
     def create_visualization(self):
         try:
             size = int(self.size_input.text())
-            if 8 <= size <= 32:
+            if MIN_GRID_SIZE <= size <= MAX_GRID_SIZE:
                 self.hide()  # Hide instead of close
                 self.app.processEvents()  # Process any pending events
                 
@@ -66,7 +70,7 @@ class MenuWindow(QMainWindow):
                 self.close()
                 self.app.quit()
             else:
-                self.error_label.setText("Please enter a number between 8 and 32")
+                self.error_label.setText(f"Please enter a number between {MIN_GRID_SIZE} and {MAX_GRID_SIZE}")
         except ValueError:
             self.error_label.setText("Please enter a valid number")
 
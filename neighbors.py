@@ -0,0 +1,111 @@
+from array import array
+from typing import List, Tuple
+from grid_model import GridModel, WALL, ALL_CELLS, STRAIGHT_COST, DIAGONAL_COST
+
+# 8-connected move offsets, straight moves first
+DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1))
+
+# Every row reserves room for 8 neighbors so a single row can be rebuilt in place
+STRIDE = 8
+
+def fill_row(grid: GridModel, cell_id: int, targets, costs) -> int:
+    """Write the free neighbors of cell_id and their move costs from cell_id * STRIDE, returns the row end"""
+    width, height = grid.width, grid.height
+    cells = grid.cells
+    y, x = divmod(cell_id, width)
+    k = cell_id * STRIDE
+    for dx, dy in DIRECTIONS:
+        new_x, new_y = x + dx, y + dy
+        if 0 <= new_x < width and 0 <= new_y < height:
+            next_id = new_y * width + new_x
+            if cells[next_id] != WALL:
+                targets[k] = next_id
+                costs[k] = DIAGONAL_COST if dx and dy else STRAIGHT_COST
+                k += 1
+    return k
+
+class NeighborTable:
+    """CSR adjacency index over a GridModel.
+
+    Row i lives in targets/costs[offsets[i]:ends[i]], with offsets[i] == i * STRIDE.
+    A row lists the free neighbors of cell i together with the move cost.
+    The table follows wall edits through a grid listener and only rebuilds
+    the rows around the edited cell.
+    """
+
+    def __init__(self, grid: GridModel):
+        self.grid = grid
+        self.width = grid.width
+        self.height = grid.height
+        size = grid.size
+        self.offsets = array('i', range(0, (size + 1) * STRIDE, STRIDE))
+        self.ends = array('i', self.offsets[:size])
+        self.targets = array('i', [0]) * (size * STRIDE)
+        self.costs = array('d', [0.0]) * (size * STRIDE)
+        self.version = -1
+        self.rebuild()
+        grid.add_listener(self._on_wall_changed)
+
+    def rebuild(self):
+        """Build every row from scratch"""
+        for cell_id in range(self.grid.size):
+            self._build_row(cell_id)
+        self.version = self.grid.version
+
+    def _build_row(self, cell_id: int):
+        self.ends[cell_id] = fill_row(self.grid, cell_id, self.targets, self.costs)
+
+    def _on_wall_changed(self, cell_id: int, blocked: bool):
+        if cell_id == ALL_CELLS:
+            self.rebuild()
+            return
+        # A row only depends on its neighbors, so the edited cell's own row is unchanged
+        y, x = divmod(cell_id, self.width)
+        for dx, dy in DIRECTIONS:
+            new_x, new_y = x + dx, y + dy
+            if 0 <= new_x < self.width and 0 <= new_y < self.height:
+                self._build_row(new_y * self.width + new_x)
+        self.version = self.grid.version
+
+    def neighbor_ids(self, cell_id: int) -> List[int]:
+        return self.targets[self.offsets[cell_id]:self.ends[cell_id]].tolist()
+
+    def neighbors(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Returns free neighboring positions"""
+        return [self.grid.cell_pos(next_id) for next_id in self.neighbor_ids(self.grid.cell_id(pos))]
+
+
+class LazyNeighborTable:
+    """NeighborTable stand-in for a grid used by a single search.
+
+    Legacy wall-set calls wrap the walls in a throwaway GridModel, and
+    building every row for it would cost far more than the search. Here a
+    row is filled in the first time its end is read. Engines always read
+    ends[cell] before they touch a row. Rows use the same layout, but
+    targets and costs are dicts, and wall edits are not followed.
+    """
+
+    def __init__(self, grid: GridModel):
+        self.grid = grid
+        self.offsets = _RowOffsets()
+        self.ends = _LazyEnds(self)
+        self.targets = {}
+        self.costs = {}
+
+
+class _RowOffsets:
+    def __getitem__(self, cell_id: int) -> int:
+        return cell_id * STRIDE
+
+
+class _LazyEnds:
+    def __init__(self, table: LazyNeighborTable):
+        self.table = table
+        self.built = {}  # Cell id -> row end, for the rows filled in so far
+
+    def __getitem__(self, cell_id: int) -> int:
+        end = self.built.get(cell_id)
+        if end is None:
+            table = self.table
+            end = self.built[cell_id] = fill_row(table.grid, cell_id, table.targets, table.costs)
+        return end
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from grid_model import GridModel, ALL_CELLS
+
+Bounds = Tuple[int, int, int, int]
+
+def explored_bounds(grid: GridModel, explored: Optional[bytearray]) -> Optional[Bounds]:
+    """Bounding box (x0, y0, x1, y1) of the cells flagged in an engine's closed set"""
+    if explored is None:
+        return None
+    first = explored.find(1)
+    if first == -1:
+        return (0, 0, -1, -1)
+    width = grid.width
+    y0 = first // width
+    y1 = explored.rfind(1) // width
+    x0, x1 = width, -1
+    for y in range(y0, y1 + 1):
+        row = y * width
+        left = explored.find(1, row, row + width)
+        if left != -1:
+            x0 = min(x0, left - row)
+            x1 = max(x1, explored.rfind(1, row, row + width) - row)
+    return (x0, y0, x1, y1)
+
+
+class CacheEntry:
+    __slots__ = ("path", "cells", "bounds", "version")
+
+    def __init__(self, path: List[Tuple[int, int]], cells: frozenset, bounds: Optional[Bounds], version: int):
+        self.path = path
+        self.cells = cells
+        self.bounds = bounds
+        self.version = version
+
+
+class PathCache:
+    """Bounded LRU of search results keyed by (engine, start, end, grid version).
+
+    Wall edits are handled per entry instead of flushing the cache:
+    - a new wall only invalidates paths that run through it, since adding
+      walls can never make another path shorter;
+    - a removed wall only invalidates entries whose explored region touches
+      it (or whose engine did not report one), since a search that never
+      expanded a neighbor of the cell could not have used it.
+    Surviving entries are re-stamped with the new grid version.
+    """
+
+    def __init__(self, grid: GridModel, maxsize: int = 256):
+        self.grid = grid
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Tuple[str, Tuple[int, int], Tuple[int, int]], CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Dropped to respect maxsize
+        self.invalidations = 0  # Dropped because a wall edit affected them
+        grid.add_listener(self._on_wall_changed)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, engine: str, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        key = (engine, start, end)
+        entry = self.entries.get(key)
+        if entry is None or entry.version != self.grid.version:
+            if entry is not None:
+                # The grid changed behind the listener's back
+                del self.entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return list(entry.path)
+
+    def put(self, engine: str, start: Tuple[int, int], end: Tuple[int, int],
+            path: List[Tuple[int, int]], explored: Optional[bytearray] = None):
+        """Store a result, explored is the engine's closed set (None if unknown)"""
+        grid = self.grid
+        cells = frozenset(grid.cell_id(pos) for pos in path)
+        self.entries[(engine, start, end)] = CacheEntry(
+            list(path), cells, explored_bounds(grid, explored), grid.version)
+        self.entries.move_to_end((engine, start, end))
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "invalidations": self.invalidations}
+
+    def _on_wall_changed(self, cell_id: int, blocked: bool):
+        if cell_id == ALL_CELLS:
+            self.clear()
+            return
+        y, x = divmod(cell_id, self.grid.width)
+        stale = []
+        for key, entry in self.entries.items():
+            if blocked:
+                if cell_id in entry.cells:
+                    stale.append(key)
+            elif entry.bounds is None:
+                stale.append(key)
+            else:
+                x0, y0, x1, y1 = entry.bounds
+                if x0 - 1 <= x <= x1 + 1 and y0 - 1 <= y <= y1 + 1:
+                    stale.append(key)
+        for key in stale:
+            del self.entries[key]
+        self.invalidations += len(stale)
+        version = self.grid.version
+        for entry in self.entries.values():
+            entry.version = version
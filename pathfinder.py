@@ -1,19 +1,97 @@
-import heapq
-from typing import Set, Tuple, List, Dict
+from array import array
+from typing import Callable, Iterable, Iterator, List, Set, Tuple, Optional
 from astar import AStar
 from dijkstra import Dijkstra
+from jps import JumpPointSearch
+from bidirectional import BidirectionalAStar, BidirectionalDijkstra
+from flow_field import FlowField, FlowFieldSearch
+from incremental import LPAStar
+from hpa import HierarchicalAStar
+from path_cache import PathCache
+from components import ComponentIndex
+from stats import SearchStats, StatsSink
+from grid_model import GridModel
+from steps import StepRecorder, VISIT, PATH, BATCH_SIZE, STEP_NAMES, iter_events
+
+# Engines selectable by name through find_path(engine=...)
+ENGINES = {
+    "astar": AStar,
+    "dijkstra": Dijkstra,
+    "jps": JumpPointSearch,
+    "bi_astar": BidirectionalAStar,
+    "bi_dijkstra": BidirectionalDijkstra,
+    "flow_field": FlowFieldSearch,
+    "lpa": LPAStar,
+    "hpa": HierarchicalAStar,
+}
 
 class PathFinder:
-    def __init__(self, grid_size: int):
+    def __init__(self, grid_size: int, grid: Optional[GridModel] = None, frontier: str = "lazy",
+                 cache_size: int = 256):
         self.grid_size = grid_size
+        self.frontier = frontier  # Frontier kind handed to every engine
+        # The grid model is shared with the GUI so edits are visible without copying
+        self.grid = grid if grid is not None else GridModel(grid_size)
+        self.start_pos = None
+        self.end_pos = None
+        self.visited_cells = set()
+        self.path = []
+        self.current_cell = None
+        self.counters = {}  # Frontier counters of the last search
+        self.engines = {}  # Engine instances are kept so per-grid tables are reused
+        self.cache = PathCache(self.grid, cache_size)
+        self._components: Optional[ComponentIndex] = None
+        self.stats_sinks: List[StatsSink] = []  # Searches are only instrumented while this is non-empty
+        self.last_stats: Optional[SearchStats] = None
+
+    @property
+    def components(self) -> ComponentIndex:
+        """Connected-component index of the shared grid, built on first use"""
+        if self._components is None:
+            self._components = ComponentIndex(self.grid)
+        return self._components
+
+    def reachable(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """O(1) check that a search from start can reach end"""
+        return self.components.reachable(start, end)
+
+    def add_stats_sink(self, sink: StatsSink):
+        """Feed a SearchStats record of every engine search to sink"""
+        self.stats_sinks.append(sink)
+
+    def remove_stats_sink(self, sink: StatsSink):
+        if sink in self.stats_sinks:
+            self.stats_sinks.remove(sink)
+
+    @property
+    def walls(self) -> Set[Tuple[int, int]]:
+        """Wall positions as a set, kept for callers of the old API"""
+        return self.grid.walls()
+
+    @walls.setter
+    def walls(self, walls):
+        self.grid.set_walls(walls)
+
+    def reset(self):
+        """Forget endpoints and results, keeping engines and the shared grid"""
         self.start_pos = None
         self.end_pos = None
-        self.walls = set()
         self.visited_cells = set()
         self.path = []
         self.current_cell = None
 
-    def find_path(self, use_astar=True):
+    def get_engine(self, name: str):
+        """Returns the cached engine instance registered under name"""
+        if name not in ENGINES:
+            raise ValueError(f"Unknown engine '{name}', expected one of {sorted(ENGINES)}")
+        if name not in self.engines:
+            if name == "jps":
+                self.engines[name] = JumpPointSearch(self.grid_size, self.frontier, use_jump_table=True)
+            else:
+                self.engines[name] = ENGINES[name](self.grid_size, self.frontier)
+        return self.engines[name]
+
+    def find_path(self, use_astar=True, engine: Optional[str] = None):
         if not self.start_pos or not self.end_pos:
             return False
 
@@ -21,77 +99,120 @@ class PathFinder:
         self.visited_cells = set()
         self.path = []
 
-        # Initialize algorithm
-        if use_astar:
-            from astar import AStar
-            algorithm = AStar(self.grid_size)
+        # Initialize algorithm, an explicit engine name overrides use_astar
+        name = engine or ("astar" if use_astar else "dijkstra")
+        if not self.reachable(self.start_pos, self.end_pos):
+            # Different components, a search would only flood the start's region
+            self.counters = {}
+            return False
+        path = self.cache.get(name, self.start_pos, self.end_pos)
+        if path is None:
+            algorithm = self.get_engine(name)
+            if self.stats_sinks:
+                stats = SearchStats(name)
+                path = algorithm.find_path(self.start_pos, self.end_pos, self.grid, stats=stats)
+                self.last_stats = stats
+                for sink in self.stats_sinks:
+                    sink.record(name, stats)
+            else:
+                path = algorithm.find_path(self.start_pos, self.end_pos, self.grid)
+            self.counters = algorithm.counters
+            self.cache.put(name, self.start_pos, self.end_pos, path, getattr(algorithm, "explored", None))
         else:
-            from dijkstra import Dijkstra
-            algorithm = Dijkstra(self.grid_size)
-
-        # Find path
-        path = algorithm.find_path(self.start_pos, self.end_pos, self.walls)
+            self.counters = {}
         if path:
             self.path = path
             return True
         return False
 
-    def find_path_animated(self, use_astar=True):
-        """Animated version of pathfinding that yields each step"""
+    def find_nearest(self, start: Tuple[int, int], goals: Iterable[Tuple[int, int]], use_astar=True,
+                     engine: Optional[str] = None) -> Tuple[Optional[Tuple[int, int]], List[Tuple[int, int]], float]:
+        """Closest of several goals by path cost in a single search, returns (goal, path, cost).
+
+        Only "astar" and "dijkstra" support several goals. Goals in other
+        components are dropped first, as they would make the search flood.
+        """
+        name = engine or ("astar" if use_astar else "dijkstra")
+        algorithm = self.get_engine(name)
+        if not hasattr(algorithm, "find_nearest"):
+            raise ValueError(f"Engine '{name}' does not support multi-goal search")
+        goals = [goal for goal in goals if self.reachable(start, goal)]
+        if not goals:
+            self.counters = {}
+            return None, [], float('inf')
+        if self.stats_sinks:
+            stats = SearchStats(name)
+            result = algorithm.find_nearest(start, goals, self.grid, stats=stats)
+            self.last_stats = stats
+            for sink in self.stats_sinks:
+                sink.record(name, stats)
+        else:
+            result = algorithm.find_nearest(start, goals, self.grid)
+        self.counters = algorithm.counters
+        return result
+
+    def cache_stats(self):
+        """Hit/miss/eviction/invalidation counts of the path cache"""
+        return self.cache.stats()
+
+    def update_walls(self, cells):
+        """Report edited wall cells so the incremental planner can repair instead of restarting"""
+        if "lpa" in self.engines:
+            self.engines["lpa"].update_walls(cells)
+
+    def flow_field(self, goal: Optional[Tuple[int, int]] = None) -> FlowField:
+        """Distance/next-step field toward goal (default end_pos), cached per wall version"""
+        return self.get_engine("flow_field").flow_field(self.grid, goal or self.end_pos)
+
+    def find_paths(self, pairs, workers: Optional[int] = None, use_astar=True, engine: Optional[str] = None):
+        """Solve many (start, end) pairs on the current walls, yielding (index, path) as they finish"""
+        from batch import find_paths
+        name = engine or ("astar" if use_astar else "dijkstra")
+        pairs = list(pairs)
+        rejected = [index for index, (start, end) in enumerate(pairs) if not self.reachable(start, end)]
+        if not rejected:
+            return find_paths(self.grid, pairs, workers, name, self.frontier)
+        return self._find_reachable_paths(pairs, rejected, workers, name)
+
+    def _find_reachable_paths(self, pairs, rejected, workers, name):
+        from batch import find_paths
+        skip = set(rejected)
+        for index in rejected:
+            yield index, []
+        indices = [index for index in range(len(pairs)) if index not in skip]
+        for local, path in find_paths(self.grid, [pairs[index] for index in indices], workers, name, self.frontier):
+            yield indices[local], path
+
+    def search_steps(self, use_astar=True, engine: Optional[str] = None,
+                     codes=(VISIT, PATH), batch_size: int = BATCH_SIZE,
+                     on_batch: Optional[Callable[[array], None]] = None) -> Iterator[array]:
+        """Run one search and yield its step events as batches of packed ints (see steps.py).
+
+        With on_batch, batches are handed to it while the search runs and
+        nothing is yielded, so a consumer that blocks or raises holds up or
+        stops the search itself.
+        """
         if not self.start_pos or not self.end_pos:
             return
 
-        # Initialize algorithm
-        if use_astar:
-            algorithm = AStar(self.grid_size)
-        else:
-            algorithm = Dijkstra(self.grid_size)
-
         # Clear previous results
         self.visited_cells = set()
         self.path = []
+        if not self.reachable(self.start_pos, self.end_pos):
+            self.counters = {}
+            return
+
+        algorithm = self.get_engine(engine or ("astar" if use_astar else "dijkstra"))
+        steps = StepRecorder(codes, on_batch, batch_size)
+        algorithm.find_path(self.start_pos, self.end_pos, self.grid, steps=steps)
+        self.counters = algorithm.counters
+        if on_batch is None:
+            yield from steps.batches()
+        else:
+            steps.flush()
 
-        # Initialize search
-        frontier = []
-        heapq.heappush(frontier, (0, self.start_pos))
-        came_from = {self.start_pos: None}
-        cost_so_far = {self.start_pos: 0}
-
-        while frontier:
-            current = heapq.heappop(frontier)[1]
-            yield "visit", current  # Yield each visited cell
-
-            if current == self.end_pos:
-                break
-
-            for next_pos in self.get_neighbors(current):
-                if next_pos in self.walls:
-                    continue
-
-                is_diagonal = abs(next_pos[0] - current[0]) == 1 and abs(next_pos[1] - current[1]) == 1
-                new_cost = cost_so_far[current] + (1.414 if is_diagonal else 1.0)
-
-                if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
-                    cost_so_far[next_pos] = new_cost
-                    priority = new_cost
-                    if use_astar:
-                        priority += algorithm.heuristic(self.end_pos, next_pos)
-                    heapq.heappush(frontier, (priority, next_pos))
-                    came_from[next_pos] = current
-
-        # Reconstruct and animate path
-        current = self.end_pos
-        while current is not None:
-            yield "path", current  # Yield each path cell
-            current = came_from.get(current)
-
-    def get_neighbors(self, pos):
-        x, y = pos
-        neighbors = []
-        for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]:
-            new_x, new_y = x + dx, y + dy
-            if (0 <= new_x < self.grid_size and 
-                0 <= new_y < self.grid_size and 
-                (new_x, new_y) not in self.walls):
-                neighbors.append((new_x, new_y))
-        return neighbors
\ No newline at end of file
+    def find_path_animated(self, use_astar=True, engine: Optional[str] = None):
+        """Animated version of pathfinding that yields each step as ("visit" or "path", position)"""
+        cell_pos = self.grid.cell_pos
+        for code, cell_id in iter_events(self.search_steps(use_astar, engine)):
+            yield STEP_NAMES[code], cell_pos(cell_id)
@@ -0,0 +1,179 @@
+import time
+from array import array
+from typing import List, Sequence
+
+INF = float('inf')
+
+# Routes with at most this many intermediate stops are solved exactly with Held-Karp
+HELD_KARP_MAX_STOPS = 12
+
+# Time budget of the 2-opt/Or-opt improvement for larger routes, in seconds
+IMPROVE_SECONDS = 0.05
+
+# Longest segment Or-opt moves at once
+OR_OPT_SEGMENT = 3
+
+class Route:
+    """Visiting order over the points of a distance matrix.
+
+    order starts at point 0 and ends at the last point, cost is its total
+    distance and optimal tells whether it came from the exact solver.
+    """
+    __slots__ = ("order", "cost", "optimal")
+
+    def __init__(self, order: List[int], cost: float, optimal: bool):
+        self.order = order
+        self.cost = cost
+        self.optimal = optimal
+
+def route_cost(order: Sequence[int], matrix: Sequence[Sequence[float]]) -> float:
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+def solve(matrix: Sequence[Sequence[float]], time_limit: float = IMPROVE_SECONDS) -> Route:
+    """Cheapest order visiting every point once, from point 0 to the last point.
+
+    matrix[i][j] is the distance between points i and j and must be
+    symmetric. Up to HELD_KARP_MAX_STOPS intermediate points the result is
+    optimal, above that it is a nearest-neighbor route improved with
+    2-opt and Or-opt moves until no move helps or time_limit runs out.
+    """
+    n = len(matrix)
+    if n == 0:
+        return Route([], 0.0, True)
+    if n <= 3:
+        order = list(range(n))
+        return Route(order, route_cost(order, matrix), True)
+    if n - 2 <= HELD_KARP_MAX_STOPS:
+        return held_karp(matrix)
+    order = nearest_neighbor(matrix)
+    deadline = time.perf_counter() + time_limit
+    improve(order, matrix, deadline)
+    return Route(order, route_cost(order, matrix), False)
+
+def held_karp(matrix: Sequence[Sequence[float]]) -> Route:
+    """Exact open-path solver, O(2^m * m^2) for m intermediate points"""
+    n = len(matrix)
+    m = n - 2
+    last = n - 1
+    full = (1 << m) - 1
+    # best[mask * m + j]: cheapest path from point 0 through the stops in mask, ending at stop j
+    best = array('d', [INF]) * ((1 << m) * m)
+    parent = array('b', [-1]) * ((1 << m) * m)
+    # Stop j is point j + 1
+    dist = [[matrix[a + 1][b + 1] for b in range(m)] for a in range(m)]
+    for j in range(m):
+        best[(1 << j) * m + j] = matrix[0][j + 1]
+
+    for mask in range(1, full + 1):
+        base = mask * m
+        for j in range(m):
+            cost = best[base + j]
+            if cost == INF or not mask >> j & 1:
+                continue
+            row = dist[j]
+            for k in range(m):
+                if mask >> k & 1:
+                    continue
+                index = (mask | 1 << k) * m + k
+                new_cost = cost + row[k]
+                if new_cost < best[index]:
+                    best[index] = new_cost
+                    parent[index] = j
+
+    total, end = INF, -1
+    for j in range(m):
+        cost = best[full * m + j] + matrix[j + 1][last]
+        if cost < total:
+            total, end = cost, j
+    if end == -1:
+        # Some stop cannot be reached, keep the input order
+        order = list(range(n))
+        return Route(order, route_cost(order, matrix), False)
+
+    order = [last]
+    mask, j = full, end
+    while j != -1:
+        order.append(j + 1)
+        mask, j = mask & ~(1 << j), parent[mask * m + j]
+    order.append(0)
+    order.reverse()
+    return Route(order, total, True)
+
+def nearest_neighbor(matrix: Sequence[Sequence[float]]) -> List[int]:
+    """Greedy order from point 0, always moving to the closest unvisited point"""
+    n = len(matrix)
+    last = n - 1
+    remaining = set(range(1, last))
+    order = [0]
+    current = 0
+    while remaining:
+        row = matrix[current]
+        current = min(remaining, key=row.__getitem__)
+        remaining.remove(current)
+        order.append(current)
+    order.append(last)
+    return order
+
+def improve(order: List[int], matrix: Sequence[Sequence[float]], deadline: float) -> bool:
+    """Apply improving 2-opt and Or-opt moves in place until none is left or the deadline passes.
+
+    The first and last points stay fixed. Returns True if a local optimum was reached.
+    """
+    improved = True
+    while improved:
+        if time.perf_counter() > deadline:
+            return False
+        improved = two_opt_pass(order, matrix, deadline) | or_opt_pass(order, matrix, deadline)
+    return True
+
+def two_opt_pass(order: List[int], matrix: Sequence[Sequence[float]], deadline: float) -> bool:
+    """Reverse order[i..j] wherever that shortens the route"""
+    n = len(order)
+    improved = False
+    for i in range(1, n - 2):
+        if time.perf_counter() > deadline:
+            break
+        a, b = order[i - 1], order[i]
+        row_a, row_b = matrix[a], matrix[b]
+        base = row_a[b]
+        for j in range(i + 1, n - 1):
+            c, e = order[j], order[j + 1]
+            if row_a[c] + row_b[e] < base + matrix[c][e] - 1e-9:
+                order[i:j + 1] = order[i:j + 1][::-1]
+                b = order[i]
+                row_b = matrix[b]
+                base = row_a[b]
+                improved = True
+    return improved
+
+def or_opt_pass(order: List[int], matrix: Sequence[Sequence[float]], deadline: float) -> bool:
+    """Move segments of up to OR_OPT_SEGMENT points to a cheaper place, reversed if that helps"""
+    improved = False
+    for length in range(1, OR_OPT_SEGMENT + 1):
+        i = 1
+        while i + length < len(order):
+            if time.perf_counter() > deadline:
+                return improved
+            first, last = order[i], order[i + length - 1]
+            before, after = order[i - 1], order[i + length]
+            removed = matrix[before][first] + matrix[last][after] - matrix[before][after]
+            segment = order[i:i + length]
+            rest = order[:i] + order[i + length:]
+            best_gain, best_at, best_reversed = 1e-9, -1, False
+            for k in range(len(rest) - 1):
+                p, q = rest[k], rest[k + 1]
+                edge = matrix[p][q]
+                gain = removed - (matrix[p][first] + matrix[last][q] - edge)
+                if gain > best_gain:
+                    best_gain, best_at, best_reversed = gain, k, False
+                gain = removed - (matrix[p][last] + matrix[first][q] - edge)
+                if gain > best_gain:
+                    best_gain, best_at, best_reversed = gain, k, True
+            if best_at == -1:
+                i += 1
+                continue
+            if best_reversed:
+                segment.reverse()
+            order[:] = rest[:best_at + 1] + segment + rest[best_at + 1:]
+            improved = True
+    return improved
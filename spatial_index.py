@@ -0,0 +1,185 @@
+import heapq
+import math
+from typing import Callable, Dict, Iterator, List, Sequence, Set, Tuple
+
+from grid_model import STRAIGHT_COST, DIAGONAL_COST
+
+Point = Tuple[int, int]
+
+# Cells per bucket side
+BUCKET_SIZE = 8
+
+# Candidates checked per path-cost batch in the grid-distance queries
+PATH_BATCH = 8
+
+def euclidean(a: Point, b: Point) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+def octile(a: Point, b: Point) -> float:
+    """Cost of the best unobstructed path, a lower bound on the grid path cost"""
+    dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return STRAIGHT_COST * abs(dx - dy) + DIAGONAL_COST * min(dx, dy)
+
+class BucketGrid:
+    """Uniform bucket grid over points, for nearest and range queries without a full scan.
+
+    Queries visit buckets in rings around the query cell and stop as soon
+    as no unvisited ring can hold anything closer. Grid path costs are
+    never below the octile distance, so path queries rank candidates by it
+    and only run real searches (through path_costs) for those that could
+    still make the cut.
+    """
+
+    def __init__(self, bucket_size: int = BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.buckets: Dict[Point, Set[Point]] = {}
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, pos: Point) -> bool:
+        bucket = self.buckets.get(self._bucket(pos))
+        return bucket is not None and pos in bucket
+
+    def _bucket(self, pos: Point) -> Point:
+        return (pos[0] // self.bucket_size, pos[1] // self.bucket_size)
+
+    def add(self, pos: Point):
+        bucket = self.buckets.setdefault(self._bucket(pos), set())
+        if pos not in bucket:
+            bucket.add(pos)
+            self.count += 1
+
+    def remove(self, pos: Point):
+        key = self._bucket(pos)
+        bucket = self.buckets.get(key)
+        if bucket is not None and pos in bucket:
+            bucket.remove(pos)
+            self.count -= 1
+            if not bucket:
+                del self.buckets[key]
+
+    def clear(self):
+        self.buckets.clear()
+        self.count = 0
+
+    def in_rect(self, x0: int, y0: int, x1: int, y1: int) -> List[Point]:
+        """Points with x0 <= x <= x1 and y0 <= y <= y1"""
+        size = self.bucket_size
+        found = []
+        for bx in range(x0 // size, x1 // size + 1):
+            for by in range(y0 // size, y1 // size + 1):
+                for pos in self.buckets.get((bx, by), ()):
+                    if x0 <= pos[0] <= x1 and y0 <= pos[1] <= y1:
+                        found.append(pos)
+        return found
+
+    def within(self, center: Point, radius: float, metric: Callable[[Point, Point], float] = euclidean) -> List[Tuple[float, Point]]:
+        """(distance, point) of every point within radius, nearest first.
+
+        metric must never be below the Chebyshev distance, which holds for
+        euclidean and octile.
+        """
+        reach = int(radius)
+        found = [(metric(center, pos), pos)
+                 for pos in self.in_rect(center[0] - reach, center[1] - reach, center[0] + reach, center[1] + reach)]
+        return sorted(item for item in found if item[0] <= radius)
+
+    def _rings(self, center: Point) -> Iterator[Tuple[int, List[Point]]]:
+        """Points bucket ring by ring, with a Chebyshev lower bound for each ring"""
+        size = self.bucket_size
+        cx, cy = self._bucket(center)
+        seen = 0
+        ring = 0
+        while seen < self.count:
+            points = []
+            for bx in range(cx - ring, cx + ring + 1):
+                for by in (range(cy - ring, cy + ring + 1) if abs(bx - cx) == ring else (cy - ring, cy + ring)):
+                    bucket = self.buckets.get((bx, by))
+                    if bucket:
+                        points.extend(bucket)
+            seen += len(points)
+            yield (ring - 1) * size + 1 if ring else 0, points
+            ring += 1
+
+    def by_distance(self, center: Point, metric: Callable[[Point, Point], float] = euclidean) -> Iterator[Tuple[float, Point]]:
+        """Every point as (distance, point) in nondecreasing distance, generated lazily"""
+        heap = []
+        for bound, points in self._rings(center):
+            while heap and heap[0][0] <= bound:
+                yield heapq.heappop(heap)
+            for pos in points:
+                heapq.heappush(heap, (metric(center, pos), pos))
+        while heap:
+            yield heapq.heappop(heap)
+
+    def nearest(self, center: Point, k: int = 1, metric: Callable[[Point, Point], float] = euclidean) -> List[Tuple[float, Point]]:
+        """The k closest points as (distance, point), nearest first"""
+        found = []
+        for item in self.by_distance(center, metric):
+            if len(found) == k:
+                break
+            found.append(item)
+        return found
+
+    def min_estimate(self, center: Point, estimate: Callable[[int, int], float]) -> float:
+        """Smallest estimate(dx, dy) from center to any point, inf when empty.
+
+        estimate must be symmetric and nondecreasing in dx and dy, like the
+        A* heuristics, so a ring whose nearest cell cannot beat the best so
+        far ends the scan.
+        """
+        best = math.inf
+        cx, cy = center
+        for bound, points in self._rings(center):
+            if best <= estimate(bound, 0):
+                break
+            for x, y in points:
+                value = estimate(abs(x - cx), abs(y - cy))
+                if value < best:
+                    best = value
+        return best
+
+    def nearest_by_path(self, center: Point, k: int,
+                        path_costs: Callable[[Point, Sequence[Point]], Sequence[float]]) -> List[Tuple[float, Point]]:
+        """The k points with the cheapest grid paths from center, as (cost, point).
+
+        path_costs(center, points) returns the grid path cost to each point,
+        inf if unreachable. Candidates come in octile order, and the query
+        stops once the next lower bound cannot beat the k-th cost found.
+        """
+        best: List[Tuple[float, Point]] = []  # Max-heap of the k cheapest, as (-cost, point)
+        candidates = self.by_distance(center, octile)
+        done = False
+        while not done:
+            limit = -best[0][0] if len(best) == k else math.inf
+            batch = []
+            for bound, pos in candidates:
+                if bound >= limit:
+                    done = True
+                    break
+                batch.append(pos)
+                if len(batch) == PATH_BATCH:
+                    break
+            else:
+                done = True
+            if not batch:
+                break
+            for pos, cost in zip(batch, path_costs(center, batch)):
+                if cost == math.inf:
+                    continue
+                if len(best) < k:
+                    heapq.heappush(best, (-cost, pos))
+                elif cost < -best[0][0]:
+                    heapq.heapreplace(best, (-cost, pos))
+        return sorted((-cost, pos) for cost, pos in best)
+
+    def within_by_path(self, center: Point, radius: float,
+                       path_costs: Callable[[Point, Sequence[Point]], Sequence[float]]) -> List[Tuple[float, Point]]:
+        """(cost, point) of every point whose grid path from center costs at most radius, cheapest first"""
+        candidates = [pos for _, pos in self.within(center, radius, octile)]
+        if not candidates:
+            return []
+        costs = path_costs(center, candidates)
+        return sorted((cost, pos) for pos, cost in zip(candidates, costs) if cost <= radius)
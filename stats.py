@@ -0,0 +1,102 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List
+
+class SearchStats:
+    """Instrumentation record an engine fills when passed as find_path(..., stats=record).
+
+    Engines only instrument a search when a record is passed, so leaving it
+    out runs the plain loop. peak_state is the number of cells holding search
+    state (the dict size for dict-based searches), peak_frontier the largest
+    frontier length, stale entries included; searches with two frontiers
+    report the sum of both.
+    """
+    FIELDS = ("expanded", "pushes", "pops", "stale_pops", "decrease_keys",
+              "peak_frontier", "peak_state", "heuristic_calls", "elapsed_ns")
+    __slots__ = ("engine", "_started") + FIELDS
+
+    def __init__(self, engine: str = ""):
+        self.engine = engine
+        self.start()
+
+    def start(self):
+        """Zero every field and start the clock, engines call this on entry"""
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self._started = time.perf_counter_ns()
+
+    def stop(self):
+        self.elapsed_ns = time.perf_counter_ns() - self._started
+
+    def count_calls(self, function: Callable) -> Callable:
+        """Wrap a heuristic so every call is counted in heuristic_calls"""
+        def counted(*args):
+            self.heuristic_calls += 1
+            return function(*args)
+        return counted
+
+    def add_frontier(self, frontier):
+        """Accumulate a frontier's counters and, if it was tracked, its peaks"""
+        counters = frontier.counters()
+        self.pushes += counters["pushes"]
+        self.pops += counters["pops"]
+        self.stale_pops += counters["stale_pops"]
+        self.decrease_keys += counters["decrease_keys"]
+        self.expanded += counters["pops"] - counters["stale_pops"]
+        self.peak_frontier += getattr(frontier, "peak_size", 0)
+        self.peak_state += getattr(frontier, "labelled", 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)}" for field in self.FIELDS)
+        return f"SearchStats({self.engine!r}, {fields})"
+
+
+class StatsSink(ABC):
+    """Receives one record per instrumented search, see PathFinder.add_stats_sink"""
+
+    @abstractmethod
+    def record(self, engine: str, stats: SearchStats):
+        """Called once per search with the engine name and its finished record"""
+
+
+class CallbackSink(StatsSink):
+    """Forwards every record to callback(engine, stats)"""
+
+    def __init__(self, callback: Callable[[str, SearchStats], None]):
+        self.callback = callback
+
+    def record(self, engine: str, stats: SearchStats):
+        self.callback(engine, stats)
+
+
+class ListSink(StatsSink):
+    """Keeps every record as a dict, e.g. for dumping to JSON"""
+
+    def __init__(self):
+        self.rows: List[Dict[str, int]] = []
+
+    def record(self, engine: str, stats: SearchStats):
+        row = {"engine": engine}
+        row.update(stats.as_dict())
+        self.rows.append(row)
+
+
+class SummarySink(StatsSink):
+    """Running per-engine totals and search counts"""
+
+    def __init__(self):
+        self.searches: Dict[str, int] = {}
+        self.totals: Dict[str, Dict[str, int]] = {}
+
+    def record(self, engine: str, stats: SearchStats):
+        self.searches[engine] = self.searches.get(engine, 0) + 1
+        totals = self.totals.setdefault(engine, dict.fromkeys(SearchStats.FIELDS, 0))
+        for field in SearchStats.FIELDS:
+            totals[field] += getattr(stats, field)
+
+    def means(self, engine: str) -> Dict[str, float]:
+        count = self.searches.get(engine, 0)
+        return {field: total / count for field, total in self.totals.get(engine, {}).items()} if count else {}
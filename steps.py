@@ -0,0 +1,97 @@
+from array import array
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Step event codes, packed with the cell id as (cell_id << CODE_BITS) | code
+VISIT = 0  # A cell was expanded (closed)
+PUSH = 1   # A cell entered or improved in the frontier
+PATH = 2   # A path cell, emitted from the end back to the start
+CODE_BITS = 2
+CODE_MASK = (1 << CODE_BITS) - 1
+
+STEP_NAMES = {VISIT: "visit", PUSH: "push", PATH: "path"}
+
+# Events per batch handed to on_batch
+BATCH_SIZE = 256
+
+class StepRecorder:
+    """Collects the step events of one search as packed ints.
+
+    Engines take an optional recorder (find_path(..., steps=recorder)) and
+    only emit when one is given, through observe() on their frontier, so
+    the plain search loop is unchanged. Event kinds outside codes are
+    dropped at the recorder. With on_batch, full batches are handed off
+    while the search runs; otherwise everything stays in events for replay
+    or inspection.
+    """
+
+    def __init__(self, codes: Iterable[int] = (VISIT, PUSH, PATH),
+                 on_batch: Optional[Callable[[array], None]] = None, batch_size: int = BATCH_SIZE):
+        self.mask = 0
+        for code in codes:
+            self.mask |= 1 << code
+        self.on_batch = on_batch
+        self.batch_size = batch_size
+        self.events = array('i')
+
+    def emit(self, code: int, cell_id: int):
+        if self.mask >> code & 1:
+            events = self.events
+            events.append(cell_id << CODE_BITS | code)
+            if self.on_batch is not None and len(events) >= self.batch_size:
+                self.flush()
+
+    def emit_path(self, grid, path: List[Tuple[int, int]]):
+        """Emit PATH events for a finished path, end first"""
+        for pos in reversed(path):
+            self.emit(PATH, grid.cell_id(pos))
+
+    def flush(self):
+        """Hand pending events to on_batch"""
+        if self.on_batch is not None and self.events:
+            events, self.events = self.events, array('i')
+            self.on_batch(events)
+
+    def batches(self, batch_size: Optional[int] = None) -> Iterator[array]:
+        """Split the recorded events into batches"""
+        size = batch_size or self.batch_size
+        events = self.events
+        for i in range(0, len(events), size):
+            yield events[i:i + size]
+
+
+def decode(event: int) -> Tuple[int, int]:
+    """Returns (code, cell_id) of a packed event"""
+    return event & CODE_MASK, event >> CODE_BITS
+
+def iter_events(batches: Iterable[array]) -> Iterator[Tuple[int, int]]:
+    """Flatten batches into (code, cell_id) pairs"""
+    for batch in batches:
+        for event in batch:
+            yield event & CODE_MASK, event >> CODE_BITS
+
+def observe(frontier, steps: StepRecorder):
+    """Make one frontier emit PUSH and VISIT events, leaving the engine loop untouched.
+
+    Like frontier.track, this shadows push/pop on the instance only, so a
+    search without a recorder runs the plain methods.
+    """
+    push, pop = frontier.push, frontier.pop
+    emit = steps.emit
+
+    def observed_push(item: int, priority):
+        push(item, priority)
+        emit(PUSH, item)
+
+    def observed_pop() -> int:
+        item = pop()
+        if item != -1:
+            emit(VISIT, item)
+        return item
+
+    frontier.push = observed_push
+    frontier.pop = observed_pop
+    return frontier
+
+def unobserve(frontier):
+    frontier.__dict__.pop("push", None)
+    frontier.__dict__.pop("pop", None)
@@ -0,0 +1,110 @@
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from grid_model import GridModel, path_cost
+from astar import AStar
+from dijkstra import Dijkstra
+
+INF = float('inf')
+
+Point = Tuple[int, int]
+
+class StopMatrix:
+    """Grid path costs between points, computed only for the pairs asked for.
+
+    Costs are kept sparsely in a dict keyed by (from, to), so memory grows
+    with the connections and queries actually made, not with the square of
+    the point count. A missing pair costs one A* search. Engines may leave a
+    wall cell but never enter one, so a cost is only shared by both
+    directions when both ends are free. Wall edits drop every cached cost.
+    """
+
+    def __init__(self, grid: GridModel, frontier: str = "lazy",
+                 reachable: Optional[Callable[[Point, Point], bool]] = None):
+        self.grid = grid
+        self.points: Set[Point] = set()
+        self.costs: Dict[Tuple[Point, Point], float] = {}
+        self.pairs: Dict[Point, Set[Point]] = {}  # Point -> points it has a cached cost with
+        self.reachable = reachable  # Optional O(1) check that skips searches that cannot succeed
+        self.searches = 0  # Searches run so far
+        self._astar = AStar(grid.width, frontier)
+        self._dijkstra = Dijkstra(grid.width, frontier)
+        self._version = grid.version
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __contains__(self, pos: Point) -> bool:
+        return pos in self.points
+
+    def add(self, pos: Point):
+        """Register pos, costs from and to it are cached from now on"""
+        self.points.add(pos)
+
+    def remove(self, pos: Point):
+        """Forget pos and every cost cached for it"""
+        self.points.discard(pos)
+        for other in self.pairs.pop(pos, ()):
+            self.costs.pop((pos, other), None)
+            self.costs.pop((other, pos), None)
+            partners = self.pairs.get(other)
+            if partners is not None:
+                partners.discard(pos)
+
+    def clear(self):
+        self.points.clear()
+        self.costs.clear()
+        self.pairs.clear()
+        self._version = self.grid.version
+
+    def cost(self, a: Point, b: Point) -> float:
+        """Grid path cost from a to b, inf if b cannot be reached"""
+        if a == b:
+            return 0.0
+        self._refresh()
+        cost = self.costs.get((a, b))
+        if cost is None:
+            cost = INF
+            if self.reachable is None or self.reachable(a, b):
+                self.searches += 1
+                path = self._astar.find_path(a, b, self.grid)
+                if path:
+                    cost = path_cost(path)
+            self._store(a, b, cost)
+        return cost
+
+    def edge_cost(self, a: Point, b: Point) -> float:
+        """Cost of a connection between a and b, which has to be walkable both ways"""
+        if self.grid.is_wall(a) or self.grid.is_wall(b):
+            return max(self.cost(a, b), self.cost(b, a))
+        return self.cost(a, b)
+
+    def costs_from(self, pos: Point, targets: Sequence[Point]) -> List[float]:
+        """Grid path costs from any cell to targets, searching once for every pair not cached"""
+        self._refresh()
+        result = [self.costs.get((pos, target)) for target in targets]
+        missing = [target for target, cost in zip(targets, result) if cost is None]
+        if missing:
+            self.searches += 1
+            found = dict(zip(missing, self._dijkstra.distances(pos, missing, self.grid)))
+            for i, target in enumerate(targets):
+                if result[i] is None:
+                    result[i] = found[target]
+                    self._store(pos, target, found[target])
+        return result
+
+    def _store(self, a: Point, b: Point, cost: float):
+        """Cache a cost between two registered points, for both directions when both ends are free"""
+        if a not in self.points or b not in self.points:
+            return
+        self.costs[(a, b)] = cost
+        if not self.grid.is_wall(a) and not self.grid.is_wall(b):
+            self.costs[(b, a)] = cost
+        self.pairs.setdefault(a, set()).add(b)
+        self.pairs.setdefault(b, set()).add(a)
+
+    def _refresh(self):
+        """Drop every cached cost after wall edits"""
+        if self._version == self.grid.version:
+            return
+        self._version = self.grid.version
+        self.costs.clear()
+        self.pairs.clear()
@@ -0,0 +1,150 @@
+import heapq
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+class StopRegistry:
+    """Stops and the connections drawn between them, with O(1) lookups by cell.
+
+    Every point that is a stop or has a connection owns a dense slot id,
+    found from its cell through cell_slot, and adjacency[slot] holds the
+    slots connected to it. Freed slots and stop numbers are handed out
+    again smallest first from min-heaps, so numbering matches the old
+    min(available_numbers) scheme without scanning.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.cell_slot = array('i', [-1]) * (width * height)
+        self.slot_pos: List[Optional[Tuple[int, int]]] = []
+        self.adjacency: List[Set[int]] = []
+        self.numbers: Dict[Tuple[int, int], int] = {}  # Stop -> displayed number, in insertion order
+        self.connections = ConnectionView(self)
+        self._free_slots: List[int] = []
+        self._free_numbers: List[int] = []
+
+    def __contains__(self, pos: Tuple[int, int]) -> bool:
+        return pos in self.numbers
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def slot(self, pos: Tuple[int, int]) -> int:
+        """Slot id of pos, -1 if it is neither a stop nor connected"""
+        return self.cell_slot[pos[1] * self.width + pos[0]]
+
+    def add_stop(self, pos: Tuple[int, int]) -> int:
+        """Make pos a stop, returns its number"""
+        if pos in self.numbers:
+            return self.numbers[pos]
+        number = heapq.heappop(self._free_numbers) if self._free_numbers else len(self.numbers) + 1
+        self.numbers[pos] = number
+        self._claim(pos)
+        return number
+
+    def remove_stop(self, pos: Tuple[int, int]):
+        """Remove a stop together with all its connections"""
+        number = self.numbers.pop(pos, None)
+        if number is None:
+            return
+        heapq.heappush(self._free_numbers, number)
+        slot = self.slot(pos)
+        for other in list(self.adjacency[slot]):
+            self.adjacency[other].discard(slot)
+            self._release(other)
+        self.adjacency[slot].clear()
+        self._release(slot)
+
+    def connected(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        slot_a, slot_b = self.slot(a), self.slot(b)
+        return slot_a != -1 and slot_b != -1 and slot_b in self.adjacency[slot_a]
+
+    def connect(self, a: Tuple[int, int], b: Tuple[int, int]):
+        if a == b:
+            return
+        slot_a, slot_b = self._claim(a), self._claim(b)
+        self.adjacency[slot_a].add(slot_b)
+        self.adjacency[slot_b].add(slot_a)
+
+    def disconnect(self, a: Tuple[int, int], b: Tuple[int, int]):
+        slot_a, slot_b = self.slot(a), self.slot(b)
+        if slot_a == -1 or slot_b == -1:
+            return
+        self.adjacency[slot_a].discard(slot_b)
+        self.adjacency[slot_b].discard(slot_a)
+        self._release(slot_a)
+        self._release(slot_b)
+
+    def toggle(self, a: Tuple[int, int], b: Tuple[int, int]) -> bool:
+        """Connect a and b, or disconnect them if they were connected. Returns whether they are now connected"""
+        if self.connected(a, b):
+            self.disconnect(a, b)
+            return False
+        self.connect(a, b)
+        return True
+
+    def neighbors(self, pos: Tuple[int, int]) -> List[Tuple[int, int]]:
+        slot = self.slot(pos)
+        if slot == -1:
+            return []
+        return [self.slot_pos[other] for other in self.adjacency[slot]]
+
+    def clear(self):
+        for pos in self.slot_pos:
+            if pos is not None:
+                self.cell_slot[pos[1] * self.width + pos[0]] = -1
+        self.slot_pos.clear()
+        self.adjacency.clear()
+        self.numbers.clear()
+        self._free_slots.clear()
+        self._free_numbers.clear()
+
+    def _claim(self, pos: Tuple[int, int]) -> int:
+        slot = self.slot(pos)
+        if slot != -1:
+            return slot
+        if self._free_slots:
+            slot = heapq.heappop(self._free_slots)
+            self.slot_pos[slot] = pos
+        else:
+            slot = len(self.slot_pos)
+            self.slot_pos.append(pos)
+            self.adjacency.append(set())
+        self.cell_slot[pos[1] * self.width + pos[0]] = slot
+        return slot
+
+    def _release(self, slot: int):
+        """Free a slot that is no longer a stop and has no connections"""
+        pos = self.slot_pos[slot]
+        if pos is None or pos in self.numbers or self.adjacency[slot]:
+            return
+        self.cell_slot[pos[1] * self.width + pos[0]] = -1
+        self.slot_pos[slot] = None
+        heapq.heappush(self._free_slots, slot)
+
+
+class ConnectionView(Mapping):
+    """Read-only {pos: set of connected positions} view of a registry, for graph searches and drawing"""
+
+    def __init__(self, registry: StopRegistry):
+        self.registry = registry
+
+    def __getitem__(self, pos: Tuple[int, int]) -> Set[Tuple[int, int]]:
+        registry = self.registry
+        slot = registry.slot(pos)
+        if slot == -1 or not registry.adjacency[slot]:
+            raise KeyError(pos)
+        return {registry.slot_pos[other] for other in registry.adjacency[slot]}
+
+    def __contains__(self, pos) -> bool:
+        slot = self.registry.slot(pos)
+        return slot != -1 and bool(self.registry.adjacency[slot])
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        registry = self.registry
+        for slot, pos in enumerate(registry.slot_pos):
+            if pos is not None and registry.adjacency[slot]:
+                yield pos
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
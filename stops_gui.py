@@ -1,5 +1,9 @@
+import time
 import pygame
 from grid import GridGUI
+from animation import TARGET_FPS
+from grid_model import WALL
+import array_render
 
 class StopsGUI(GridGUI):
     def __init__(self, window_size, grid_size):
@@ -11,6 +15,9 @@ class StopsGUI(GridGUI):
         self.logic = None
         self.is_dragging = False
         self.drag_start = None
+        self.cost_font = pygame.font.Font(None, 36)
+        if self.array_renderer is not None:
+            self.array_renderer.set_color(array_render.STOP, self.ORANGE)
 
     def run(self):
         running = True
@@ -18,6 +25,9 @@ class StopsGUI(GridGUI):
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+
+                elif event.type == pygame.KEYDOWN:
+                    self.handle_animation_key(event.key)
                 
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     mouse_pos = pygame.mouse.get_pos()
@@ -52,6 +62,7 @@ class StopsGUI(GridGUI):
                         self.logic.update_connection(pygame.mouse.get_pos())
 
             # Update display
+            self.advance_animation()
             self.draw_grid()
             
             # Draw connection preview line while dragging
@@ -60,7 +71,9 @@ class StopsGUI(GridGUI):
                 pygame.draw.line(self.screen, self.BLUE, self.drag_start, mouse_pos, 2)
             
             pygame.display.flip()
+            self.clock.tick(TARGET_FPS)
 
+        self.stop_animation()
         pygame.quit()
 
     def get_menu_option(self, pos):
@@ -70,6 +83,10 @@ class StopsGUI(GridGUI):
         return -1
 
     def draw_grid(self):
+        if self.array_renderer is not None:
+            self._draw_array_grid()
+            return
+
         # Fill background with white
         pygame.draw.rect(self.screen, self.WHITE, 
                         (0, self.MENU_HEIGHT, self.WINDOW_SIZE, self.WINDOW_SIZE))
@@ -81,6 +98,26 @@ class StopsGUI(GridGUI):
         self._draw_stops()
         self._draw_start_end()
         self._draw_selected_stop()
+        self._draw_total_cost()
+
+    def _draw_array_grid(self):
+        """Same layers as draw_grid, with the cells drawn by the array renderer in one blit"""
+        renderer = self.array_renderer
+        renderer.set_walls(self.grid.cells, WALL)
+        renderer.set_cells(self.logic.visited_cells, array_render.VISITED)
+        renderer.set_cells(self.logic.path, array_render.PATH)
+        renderer.set_cells(self.logic.stops, array_render.STOP)
+        if self.logic.start_pos:
+            renderer.set_cell(self.logic.start_pos, array_render.START)
+        if self.logic.end_pos:
+            renderer.set_cell(self.logic.end_pos, array_render.END)
+
+        self.draw_menu()
+        renderer.draw(self.screen)
+        self._draw_connections()
+        self._draw_stop_numbers()
+        self._draw_selected_stop()
+        self._draw_total_cost()
 
     def _draw_grid_lines(self):
         # Draw grid lines
@@ -107,8 +144,8 @@ class StopsGUI(GridGUI):
         pygame.draw.line(self.screen, self.BLUE, (x1, y1), (x2, y2), 2)
         
         # Draw connection cost
-        cost = abs(stop2[0] - stop1[0]) + abs(stop2[1] - stop1[1])
-        self._draw_cost(cost, (x1 + x2) // 2, (y1 + y2) // 2)
+        cost = self.logic.connection_cost(stop1, stop2)
+        self._draw_cost(f"{round(cost, 1):g}", (x1 + x2) // 2, (y1 + y2) // 2)
 
     def _draw_cost(self, cost, x, y):
         text = self.font.render(str(cost), True, self.BLACK)
@@ -128,8 +165,12 @@ class StopsGUI(GridGUI):
             self.draw_cell(cell, self.YELLOW)
 
     def _draw_stops(self):
-        for stop_pos, stop_num in self.logic.stops.items():
+        for stop_pos in self.logic.stops:
             self.draw_cell(stop_pos, self.ORANGE)
+        self._draw_stop_numbers()
+
+    def _draw_stop_numbers(self):
+        for stop_pos, stop_num in self.logic.stops.items():
             text = self.font.render(str(stop_num), True, self.BLACK)
             x = stop_pos[0] * self.CELL_SIZE + self.CELL_SIZE // 2
             y = stop_pos[1] * self.CELL_SIZE + self.MENU_HEIGHT + self.CELL_SIZE // 2
@@ -147,4 +188,10 @@ class StopsGUI(GridGUI):
             rect = (self.logic.selected_stop[0] * self.CELL_SIZE, 
                    self.logic.selected_stop[1] * self.CELL_SIZE + self.MENU_HEIGHT,
                    self.CELL_SIZE, self.CELL_SIZE)
-            pygame.draw.rect(self.screen, self.YELLOW, rect, 3)
\ No newline at end of file
+            pygame.draw.rect(self.screen, self.YELLOW, rect, 3)
+
+    def _draw_total_cost(self):
+        if self.logic.total_cost is not None and time.perf_counter() < self.logic.cost_shown_until:
+            text = self.cost_font.render(f"Total Cost: {self.logic.total_cost:g}", True, self.BLACK)
+            text_rect = text.get_rect(center=(self.WINDOW_SIZE // 2, self.MENU_HEIGHT // 2))
+            self.screen.blit(text, text_rect)
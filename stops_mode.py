@@ -1,9 +1,32 @@
 import pygame
 from grid import GridGUI
-from collections import OrderedDict
 from typing import List, Tuple, Dict
 import time
 from stops_gui import StopsGUI
+from routing import solve
+from contraction import ContractionHierarchy
+from stop_matrix import StopMatrix
+from stop_registry import StopRegistry
+from spatial_index import BucketGrid
+from grid_model import path_cost
+
+# Stops highlighted per second while walking a route
+STOP_SPEED = 2.0
+# How long the total cost of a route stays on screen
+COST_DISPLAY_SECONDS = 2.0
+# Legs searched in a worker pool once at least this many are not cached
+PARALLEL_MIN_LEGS = 8
+# Connections snap to a point at most this many cells from the cursor
+SNAP_DISTANCE = 1.5
+
+INF = float('inf')
+
+def stitch(paths):
+    """Join consecutive leg paths into one cell route, dropping the shared joints"""
+    route = []
+    for path in paths:
+        route.extend(path[1:] if route and path and path[0] == route[-1] else path)
+    return route
 
 class StopsMode:
     def __init__(self, window_size, grid_size):
@@ -11,9 +34,8 @@ class StopsMode:
         self.gui.logic = self
         
         self.grid_size = grid_size
-        self.stops = OrderedDict()
-        self.connections = {}
-        self.available_numbers = []
+        self.registry = StopRegistry(grid_size, grid_size)  # Stops and connections
+        self.stop_index = BucketGrid()  # Stop positions, for nearest and range queries
         self.selected_stop = None
         self.is_connecting = False
         
@@ -23,25 +45,49 @@ class StopsMode:
         self.visited_cells = set()
         self.current_cell = None
         self.temp_connection = None  # Add this line
+        self.total_cost = None
+        self.cost_shown_until = 0.0
+        self.route_points = []  # Start, stops and end in visiting order
+        self.leg_costs = []  # Grid path cost between consecutive route points
+        # Grid path costs between stops and endpoints, computed as pairs are asked for
+        self.stop_matrix = StopMatrix(self.gui.grid, reachable=self.gui.pathfinder.reachable)
+        # Shortest paths over the connections, updated as they are toggled
+        self.hierarchy = ContractionHierarchy(self.connection_cost)
+        self._hierarchy_version = self.gui.grid.version
+
+    @property
+    def stops(self):
+        """Stop position -> displayed number, in insertion order"""
+        return self.registry.numbers
+
+    @property
+    def connections(self):
+        """Read-only {pos: set of connected positions} view of the drawn connections"""
+        return self.registry.connections
 
     def add_stop(self, cell_pos):
-        if self.available_numbers:
-            number = min(self.available_numbers)
-            self.available_numbers.remove(number)
-        else:
-            number = len(self.stops) + 1
-        self.stops[cell_pos] = number
+        self.registry.add_stop(cell_pos)
+        self.stop_index.add(cell_pos)
+        self.stop_matrix.add(cell_pos)
 
     def remove_stop(self, cell_pos):
-        if cell_pos in self.stops:
-            number = self.stops[cell_pos]
-            self.available_numbers.append(number)
-            self.stops.pop(cell_pos)
+        """Remove a stop and its connections"""
+        if cell_pos in self.registry:
+            neighbors = self.registry.neighbors(cell_pos)
+            for neighbor in neighbors:
+                self.hierarchy.disconnect(cell_pos, neighbor)
+            self.registry.remove_stop(cell_pos)
+            self.stop_index.remove(cell_pos)
+            self.release_point(cell_pos)
+            for neighbor in neighbors:
+                self.release_point(neighbor)
 
     def clear_all(self):
-        self.stops.clear()
-        self.connections.clear()
-        self.available_numbers = []
+        self.gui.stop_animation()
+        self.registry.clear()
+        self.stop_index.clear()
+        self.stop_matrix.clear()
+        self.hierarchy.build({})
         self.selected_stop = None
         self.is_connecting = False
         self.start_pos = None
@@ -49,25 +95,116 @@ class StopsMode:
         self.path = []
         self.visited_cells = set()
         self.current_cell = None
+        self.cost_shown_until = 0.0
+        self.route_points = []
+        self.leg_costs = []
+
+    def connection_cost(self, a, b):
+        """Cost of a drawn connection, the grid path cost between its ends"""
+        return self.stop_matrix.edge_cost(a, b)
+
+    def release_point(self, pos):
+        """Drop pos and its cached costs once nothing refers to it"""
+        if pos is not None and pos not in self.stops and pos not in self.connections \
+                and pos != self.start_pos and pos != self.end_pos:
+            self.stop_matrix.remove(pos)
+
+    def cell_at(self, pos):
+        """Grid cell under a screen position"""
+        return (pos[0] // self.gui.CELL_SIZE, (pos[1] - self.gui.MENU_HEIGHT) // self.gui.CELL_SIZE)
+
+    def is_point(self, cell_pos):
+        """Whether connections can start or end at cell_pos, O(1) at any stop count"""
+        return cell_pos in self.registry or cell_pos == self.start_pos or cell_pos == self.end_pos
+
+    def nearest_stops(self, cell_pos, k=1, by_path=False):
+        """The k stops closest to cell_pos as (distance, stop), straight-line or by grid path cost"""
+        if by_path:
+            if k == 1:
+                # One multi-goal A* stops at the closest stop
+                stop, _, cost = self.gui.pathfinder.find_nearest(cell_pos, self.stops)
+                return [] if stop is None else [(cost, stop)]
+            return self.stop_index.nearest_by_path(cell_pos, k, self.grid_costs)
+        return self.stop_index.nearest(cell_pos, k)
+
+    def stops_within(self, cell_pos, radius, by_path=False):
+        """(distance, stop) of every stop within radius of cell_pos, nearest first"""
+        if by_path:
+            return self.stop_index.within_by_path(cell_pos, radius, self.grid_costs)
+        return self.stop_index.within(cell_pos, radius)
+
+    def stops_in_rect(self, x0, y0, x1, y1):
+        return self.stop_index.in_rect(x0, y0, x1, y1)
+
+    def grid_costs(self, source, targets):
+        """Grid path costs from source to targets, skipping the search for targets in other regions"""
+        finder = self.gui.pathfinder
+        reachable = [target for target in targets if finder.reachable(source, target)]
+        costs = dict(zip(reachable, self.stop_matrix.costs_from(source, reachable))) if reachable else {}
+        return [costs.get(target, INF) for target in targets]
+
+    def snap_point(self, cell_pos):
+        """The point connections would use for cell_pos: itself, or the nearest stop within SNAP_DISTANCE"""
+        if self.is_point(cell_pos):
+            return cell_pos
+        nearest = self.stop_index.nearest(cell_pos)
+        if nearest and nearest[0][0] <= SNAP_DISTANCE:
+            return nearest[0][1]
+        return None
+
+    def toggle_connection(self, a, b):
+        """Connect two points, or disconnect them if they already are"""
+        if self.registry.toggle(a, b):
+            self.stop_matrix.add(a)
+            self.stop_matrix.add(b)
+            self.hierarchy.connect(a, b)
+        else:
+            self.hierarchy.disconnect(a, b)
+            self.release_point(a)
+            self.release_point(b)
+
+    def connected_points(self, source):
+        """Every point reachable from source over the connections, source included"""
+        seen = {source}
+        stack = [source]
+        while stack:
+            for neighbor in self.registry.neighbors(stack.pop()):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+        return seen
+
+    def stop_hierarchy(self):
+        """Contraction hierarchy of the connections, rebuilt once updates have degraded it"""
+        if self.hierarchy.stale:
+            self.hierarchy.build(self.connections)
+        elif self._hierarchy_version != self.gui.grid.version:
+            self.hierarchy.reweigh()  # Walls moved, so did the connection costs
+        self._hierarchy_version = self.gui.grid.version
+        return self.hierarchy
 
     def handle_grid_click(self, pos):
         """Handle grid clicks based on selected option"""
         # Convert screen position to grid position
-        cell_pos = (pos[0] // self.gui.CELL_SIZE,
-                    (pos[1] - self.gui.MENU_HEIGHT) // self.gui.CELL_SIZE)
+        cell_pos = self.cell_at(pos)
         
         if not (0 <= cell_pos[0] < self.grid_size and 0 <= cell_pos[1] < self.grid_size):
             return
+        self.gui.stop_animation()
 
         if self.gui.selected_option == 0:  # Start position
             if cell_pos not in self.stops:
-                self.start_pos = cell_pos
+                old, self.start_pos = self.start_pos, cell_pos
+                self.stop_matrix.add(cell_pos)
+                self.release_point(old)
                 self.path = []
                 self.visited_cells = set()
         
         elif self.gui.selected_option == 1:  # End position
             if cell_pos not in self.stops:
-                self.end_pos = cell_pos
+                old, self.end_pos = self.end_pos, cell_pos
+                self.stop_matrix.add(cell_pos)
+                self.release_point(old)
                 self.path = []
                 self.visited_cells = set()
         
@@ -76,101 +213,35 @@ class StopsMode:
                 if cell_pos in self.stops:
                     # Remove stop and its connections
                     self.remove_stop(cell_pos)
-                    if cell_pos in self.connections:
-                        # Remove connections to this stop
-                        connected_stops = self.connections[cell_pos].copy()
-                        for connected_stop in connected_stops:
-                            if connected_stop in self.connections:
-                                self.connections[connected_stop].remove(cell_pos)
-                                if not self.connections[connected_stop]:
-                                    self.connections.pop(connected_stop)
-                        self.connections.pop(cell_pos)
                 else:
                     # Add new stop
                     self.add_stop(cell_pos)
         
         elif self.gui.selected_option == 3:  # Connect/Disconnect stops
-            valid_points = list(self.stops.keys())
-            if self.start_pos:
-                valid_points.append(self.start_pos)
-            if self.end_pos:
-                valid_points.append(self.end_pos)
-                
-            if cell_pos in valid_points:
+            cell_pos = self.snap_point(cell_pos)
+            if cell_pos is not None:
                 if not self.is_connecting:
                     self.selected_stop = cell_pos
                     self.is_connecting = True
                 else:
                     if cell_pos != self.selected_stop:
-                        # Check if connection exists
-                        if (self.selected_stop in self.connections and 
-                            cell_pos in self.connections[self.selected_stop]):
-                            # Remove existing connection
-                            self.connections[self.selected_stop].remove(cell_pos)
-                            self.connections[cell_pos].remove(self.selected_stop)
-                            # Clean up empty sets
-                            if not self.connections[self.selected_stop]:
-                                self.connections.pop(self.selected_stop)
-                            if not self.connections[cell_pos]:
-                                self.connections.pop(cell_pos)
-                        else:
-                            # Add new connection
-                            if self.selected_stop not in self.connections:
-                                self.connections[self.selected_stop] = set()
-                            if cell_pos not in self.connections:
-                                self.connections[cell_pos] = set()
-                            self.connections[self.selected_stop].add(cell_pos)
-                            self.connections[cell_pos].add(self.selected_stop)
+                        self.toggle_connection(self.selected_stop, cell_pos)
                     self.selected_stop = None
                     self.is_connecting = False
 
     def finish_connection(self, pos):
         """Finish connecting two stops"""
-        cell_pos = (pos[0] // self.gui.CELL_SIZE,
-                   (pos[1] - self.gui.MENU_HEIGHT) // self.gui.CELL_SIZE)
-
-        valid_points = list(self.stops.keys())
-        if self.start_pos:
-            valid_points.append(self.start_pos)
-        if self.end_pos:
-            valid_points.append(self.end_pos)
-
-        if cell_pos in valid_points and self.selected_stop and cell_pos != self.selected_stop:
-            # Check if connection exists
-            if (self.selected_stop in self.connections and 
-                cell_pos in self.connections[self.selected_stop]):
-                # Remove existing connection
-                self.connections[self.selected_stop].remove(cell_pos)
-                self.connections[cell_pos].remove(self.selected_stop)
-                # Clean up empty sets
-                if not self.connections[self.selected_stop]:
-                    self.connections.pop(self.selected_stop)
-                if not self.connections[cell_pos]:
-                    self.connections.pop(cell_pos)
-            else:
-                # Add new connection
-                if self.selected_stop not in self.connections:
-                    self.connections[self.selected_stop] = set()
-                if cell_pos not in self.connections:
-                    self.connections[cell_pos] = set()
-                self.connections[self.selected_stop].add(cell_pos)
-                self.connections[cell_pos].add(self.selected_stop)
+        cell_pos = self.snap_point(self.cell_at(pos))
+        if cell_pos is not None and self.selected_stop and cell_pos != self.selected_stop:
+            self.toggle_connection(self.selected_stop, cell_pos)
 
         self.selected_stop = None
         self.is_connecting = False
 
     def start_connection(self, pos):
         """Start creating a connection"""
-        cell_pos = (pos[0] // self.gui.CELL_SIZE,
-                   (pos[1] - self.gui.MENU_HEIGHT) // self.gui.CELL_SIZE)
-        
-        valid_points = list(self.stops.keys())
-        if self.start_pos:
-            valid_points.append(self.start_pos)
-        if self.end_pos:
-            valid_points.append(self.end_pos)
-            
-        if cell_pos in valid_points:
+        cell_pos = self.snap_point(self.cell_at(pos))
+        if cell_pos is not None:
             self.selected_stop = cell_pos
             self.is_connecting = True
 
@@ -184,35 +255,9 @@ class StopsMode:
         if not self.is_connecting:
             return
 
-        cell_pos = (pos[0] // self.gui.CELL_SIZE,
-                   (pos[1] - self.gui.MENU_HEIGHT) // self.gui.CELL_SIZE)
-
-        valid_points = list(self.stops.keys())
-        if self.start_pos:
-            valid_points.append(self.start_pos)
-        if self.end_pos:
-            valid_points.append(self.end_pos)
-
-        if cell_pos in valid_points and self.selected_stop and cell_pos != self.selected_stop:
-            # Toggle connection
-            if (self.selected_stop in self.connections and 
-                cell_pos in self.connections[self.selected_stop]):
-                # Remove existing connection
-                self.connections[self.selected_stop].remove(cell_pos)
-                self.connections[cell_pos].remove(self.selected_stop)
-                # Clean up empty sets
-                if not self.connections[self.selected_stop]:
-                    self.connections.pop(self.selected_stop)
-                if not self.connections[cell_pos]:
-                    self.connections.pop(cell_pos)
-            else:
-                # Add new connection
-                if self.selected_stop not in self.connections:
-                    self.connections[self.selected_stop] = set()
-                if cell_pos not in self.connections:
-                    self.connections[cell_pos] = set()
-                self.connections[self.selected_stop].add(cell_pos)
-                self.connections[cell_pos].add(self.selected_stop)
+        cell_pos = self.snap_point(self.cell_at(pos))
+        if cell_pos is not None and self.selected_stop and cell_pos != self.selected_stop:
+            self.toggle_connection(self.selected_stop, cell_pos)
 
         self.selected_stop = None
         self.is_connecting = False
@@ -224,81 +269,82 @@ class StopsMode:
             return
 
         # Reset previous path
+        self.gui.stop_animation()
         self.path = []
         self.visited_cells = set()
         self.current_cell = None
+        self.route_points = []
+        self.leg_costs = []
 
-        # Get all stops that are connected (either directly or indirectly)
-        connected_stops = set()
-        to_visit = {self.start_pos}
-        visited = set()
-        total_cost = 0
-
-        while to_visit:
-            current = to_visit.pop()
-            visited.add(current)
-            if current in self.connections:
-                connected_stops.add(current)
-                for next_stop in self.connections[current]:
-                    if next_stop not in visited:
-                        to_visit.add(next_stop)
-
-        # Create ordered list of points to visit
+        # Stops connected to the start, directly or indirectly, must all be visited
+        reachable = self.connected_points(self.start_pos)
+        targets = [stop for stop in self.stops if stop in reachable and stop != self.end_pos]
+        points = [self.start_pos] + targets + [self.end_pos]
+
+        # Distances along the drawn connections, the end falls back to a direct hop if it is not connected
+        hierarchy = self.stop_hierarchy()
+        matrix = hierarchy.many_to_many(points[:-1], points)
+        for point, row in zip(points, matrix):
+            if row[-1] == INF:
+                row[-1] = self.connection_cost(point, self.end_pos)
+        matrix.append([row[-1] for row in matrix] + [0.0])
+
+        route = solve(matrix)
+
+        # Expand the order into the points actually passed along the connections
         points_to_visit = [self.start_pos]
-        current_point = self.start_pos
-
-        # Find path through stops
-        visited_stops = {self.start_pos}
-        path_costs = []  # Store costs between stops
-
-        while len(visited_stops) < len(connected_stops):
-            if current_point not in self.connections:
-                break
-
-            # Find next stop with lowest cost
-            nearest = None
-            min_cost = float('inf')
-            for next_point in self.connections[current_point]:
-                if next_point not in visited_stops:
-                    cost = abs(next_point[0] - current_point[0]) + abs(next_point[1] - current_point[1])
-                    if cost < min_cost:
-                        min_cost = min_cost
-                        nearest = next_point
-
-            if nearest:
-                points_to_visit.append(nearest)
-                path_costs.append(min_cost)
-                total_cost += min_cost
-                visited_stops.add(nearest)
-                current_point = nearest
-                
-                # Highlight current stop and show cost
-                self.current_cell = nearest
-                self.visited_cells.add(nearest)
-                self.gui.draw_grid()
-                pygame.display.flip()
-                pygame.event.pump()
-                time.sleep(0.5)  # Longer delay to see each stop
-
-        # Add final connection to end point if needed
-        if points_to_visit[-1] != self.end_pos:
-            points_to_visit.append(self.end_pos)
-            final_cost = abs(self.end_pos[0] - points_to_visit[-2][0]) + abs(self.end_pos[1] - points_to_visit[-2][1])
-            path_costs.append(final_cost)
-            total_cost += final_cost
-
-        # Show final path through stops
-        self.path = points_to_visit
-        
-        # Draw final state with total cost
-        font = pygame.font.Font(None, 36)
-        text = font.render(f"Total Cost: {total_cost}", True, (0, 0, 0))
-        text_rect = text.get_rect(center=(self.gui.WINDOW_SIZE // 2, self.gui.MENU_HEIGHT // 2))
-        self.gui.screen.blit(text, text_rect)
-        pygame.display.flip()
-        time.sleep(2)  # Show total cost for 2 seconds
+        for a, b in zip(route.order, route.order[1:]):
+            source, target = points[a], points[b]
+            leg = hierarchy.path(source, target)
+            points_to_visit.extend(leg[1:] if leg else [target])
+        reached = points_to_visit[1:-1]
 
-        self.current_cell = None
+        # Grid paths of the legs are searched on the animation worker, then each stop is highlighted in turn
+        engine = "astar" if use_astar else "dijkstra"
+        result = {}
+
+        def produce(emit):
+            result["legs"] = self.compute_legs(points_to_visit, engine)
+            return [reached]
+
+        def finish(completed):
+            self.current_cell = None
+            if completed:
+                legs = result["legs"]
+                self.route_points = points_to_visit
+                self.path = stitch([path for path, _ in legs])
+                self.leg_costs = [cost for _, cost in legs]
+                self.total_cost = sum(self.leg_costs)
+                self.cost_shown_until = time.perf_counter() + COST_DISPLAY_SECONDS
+
+        self.gui.start_animation(produce, self.show_stop, finish, speed=STOP_SPEED)
+
+    def compute_legs(self, points, engine, workers=None):
+        """Grid path and cost of every consecutive pair of points, as [(path, cost)].
+
+        Legs come from the pathfinder's cache when their endpoints and the
+        walls they depend on are unchanged, so moving one stop only searches
+        the legs touching it. The rest run in a worker pool once there are
+        PARALLEL_MIN_LEGS of them.
+        """
+        finder = self.gui.pathfinder
+        pairs = list(zip(points, points[1:]))
+        paths = {}
+        for pair in pairs:
+            if pair not in paths:
+                paths[pair] = finder.cache.get(engine, *pair)
+        missing = [pair for pair, path in paths.items() if path is None]
+        if missing:
+            workers = workers if len(missing) >= PARALLEL_MIN_LEGS else 1
+            for index, path in finder.find_paths(missing, workers, engine=engine):
+                paths[missing[index]] = path
+                finder.cache.put(engine, *missing[index], path)
+        return [(paths[pair], path_cost(paths[pair]) if paths[pair] or pair[0] == pair[1] else INF)
+                for pair in pairs]
+
+    def show_stop(self, stop):
+        self.current_cell = stop
+        self.visited_cells.add(stop)
 
     def run(self):
         self.gui.run()
\ No newline at end of file